@@ -1,96 +1,363 @@
 #!/usr/bin/env python
-import os, random, json
+import os, re, sys, csv, io, json, base64, time, zlib, gzip, hashlib, mimetypes, threading, operator, queue, functools, hmac
+from collections import Counter, namedtuple
+from itertools import chain
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, current_app
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, current_app, Response, send_from_directory, stream_with_context, g, has_request_context, has_app_context
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import bindparam, func, insert, literal, null, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
 from flask_migrate import Migrate
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from flask_socketio import SocketIO, emit, join_room
+from flask_socketio import SocketIO, join_room, leave_room
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from flask.sessions import SecureCookieSessionInterface
+import click
+from tokenizer import extract_keywords, extract_keywords_batch
+from pubsub import SQLiteManager
+import garden
 
 # Initialize Flask app and configuration
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///garden.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/Images/plants'
+# Shared Socket.IO message queue for multi-worker deployments: redis://, amqp://
+# or sqlite:///path (local stand-in, see pubsub.py). Unset = single process.
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+# /metrics is visible to these users, or to scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+app.config['ADMIN_USERNAMES'] = {name.strip() for name in os.environ.get('ADMIN_USERNAMES', '').split(',') if name.strip()}
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# In debug mode, requests issuing more queries than this are logged
+app.config['QUERY_BUDGET'] = int(os.environ.get('QUERY_BUDGET', 25))
+
+# Database Engines
+# DATABASE_URL picks the primary database (sqlite:///garden.db by default, or a
+# postgresql:// URL). GET requests read through a separate pool: DATABASE_READ_URL
+# if set (e.g. a Postgres replica), otherwise the same SQLite file opened
+# query-only, which WAL lets run alongside the writer.
+READ_BIND = 'replica'
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -16000,
+    'temp_store': 'MEMORY',
+}
+
+def database_url(url):
+    # Heroku-style postgres:// URLs are not accepted by SQLAlchemy
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def is_memory_sqlite(url):
+    return url.startswith('sqlite:') and url.split('?')[0] in ('sqlite://', 'sqlite:///', 'sqlite:///:memory:')
+
+def engine_options(url, pool_size):
+    if is_memory_sqlite(url):
+        return {}
+    options = {'pool_size': pool_size, 'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+               'pool_timeout': 30}
+    if url.startswith('sqlite:'):
+        options['connect_args'] = {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000}
+    else:
+        options.update(pool_pre_ping=True, pool_recycle=1800)
+    return options
+
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url(os.environ.get('DATABASE_URL', 'sqlite:///garden.db'))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], int(os.environ.get('DB_POOL_SIZE', 5)))
+if not is_memory_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+    _read_url = database_url(os.environ.get('DATABASE_READ_URL', app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config['SQLALCHEMY_BINDS'] = {READ_BIND: {
+        'url': _read_url, **engine_options(_read_url, int(os.environ.get('DB_READ_POOL_SIZE', 10)))}}
+
+class RoutingSession(FlaskSession):
+    """Sends GET/HEAD reads to the read pool until the transaction writes anything."""
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and READ_BIND in self._db.engines and not self.info.get('wrote'):
+            if self._flushing or getattr(clause, 'is_dml', False) or not self._is_clean():
+                self.info['wrote'] = True
+            elif has_request_context() and request.method in ('GET', 'HEAD'):
+                return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
-socketio = SocketIO(app)
+def _apply_sqlite_pragmas(query_only):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        if query_only:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+    return on_connect
+
+with app.app_context():
+    for _bind, _engine in db.engines.items():
+        if _engine.dialect.name == 'sqlite':
+            db.event.listen(_engine, 'connect', _apply_sqlite_pragmas(query_only=_bind == READ_BIND))
+
+if (app.config['SOCKETIO_MESSAGE_QUEUE'] or '').startswith('sqlite:'):
+    socketio = SocketIO(app, client_manager=SQLiteManager(app.config['SOCKETIO_MESSAGE_QUEUE']))
+else:
+    socketio = SocketIO(app, message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+
+# Real-time Emit Buffering
+# Events queued during a request are grouped per room, coalesced and sent after
+# the response as one frame per room ('batch' when there is more than one
+# event; static/js/socketBatch.js unpacks it on the client).
+IDEMPOTENT_EVENTS = {'garden_update', 'user_state_update'}
+
+def _coalesce(events):
+    # Idempotent events keep their first slot but only the latest payload
+    latest = {event: data for event, data in events if event in IDEMPOTENT_EVENTS}
+    coalesced = []
+    for event, data in events:
+        if event in IDEMPOTENT_EVENTS:
+            if event not in latest:
+                continue
+            data = latest.pop(event)
+        coalesced.append((event, data))
+    return coalesced
+
+class EmitBuffer:
+    """Sends per-room event lists, debouncing rooms that flushed within `window` seconds."""
+    def __init__(self, window=0.25):
+        self.window = window
+        self._lock = threading.Lock()
+        self._held = {}
+        self._last_flush = {}
+
+    def publish(self, events_by_room):
+        for room, events in events_by_room.items():
+            with self._lock:
+                if room in self._held:
+                    self._held[room].extend(events)
+                    continue
+                if time.monotonic() - self._last_flush.get(room, float('-inf')) < self.window:
+                    self._held[room] = list(events)
+                    socketio.start_background_task(self._flush_later, room)
+                    continue
+                self._last_flush[room] = time.monotonic()
+            self._send(room, events)
+
+    def _flush_later(self, room):
+        socketio.sleep(self.window)
+        with self._lock:
+            events = self._held.pop(room, [])
+            self._last_flush[room] = time.monotonic()
+        self._send(room, events)
+
+    def _send(self, room, events):
+        events = _coalesce(events)
+        if len(events) == 1:
+            socketio.emit(*events[0], room=room)
+        elif events:
+            socketio.emit('batch', [{'event': event, 'data': data} for event, data in events], room=room)
+
+emit_buffer = EmitBuffer()
+
+def queue_emit(event, data, room=None):
+    if not has_request_context():
+        socketio.emit(event, data, room=room)
+        return
+    if 'emits' not in g:
+        g.emits = {}
+    g.emits.setdefault(room, []).append((event, data))
+
+@app.teardown_request
+def flush_emits(exc):
+    # Runs once the response has been built; events from failed requests are dropped
+    events = g.pop('emits', None)
+    if events and exc is None:
+        emit_buffer.publish(events)
+
+# Query Profiling
+# Every HTTP request and Socket.IO event gets a profile in g; the cursor hooks
+# below add each statement's SQL and duration to it. Totals are aggregated per
+# endpoint and exposed at /metrics in Prometheus text format.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class EndpointStats:
+    __slots__ = ('requests', 'queries', 'duplicates', 'db_seconds', 'seconds', 'max_queries', 'buckets')
+
+    def __init__(self):
+        self.requests = self.queries = self.duplicates = self.max_queries = 0
+        self.db_seconds = self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+class QueryProfiler:
+    METRICS = (
+        ('garden_requests_total', 'counter', 'Requests handled', 'requests'),
+        ('garden_request_queries_total', 'counter', 'SQL statements executed', 'queries'),
+        ('garden_request_duplicate_queries_total', 'counter', 'Statements repeating SQL already run in the same request', 'duplicates'),
+        ('garden_request_db_seconds_total', 'counter', 'Time spent executing SQL', 'db_seconds'),
+        ('garden_request_max_queries', 'gauge', 'Most SQL statements issued by a single request', 'max_queries'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def start(self):
+        g.query_profile = {'started': time.perf_counter(), 'statements': Counter(), 'db_seconds': 0.0}
+
+    def finish(self, endpoint):
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return
+        elapsed = time.perf_counter() - profile['started']
+        statements = profile['statements']
+        queries = sum(statements.values())
+        duplicates = queries - len(statements)
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.requests += 1
+            stats.queries += queries
+            stats.duplicates += duplicates
+            stats.db_seconds += profile['db_seconds']
+            stats.seconds += elapsed
+            stats.max_queries = max(stats.max_queries, queries)
+            for i in range(bisect_left(DURATION_BUCKETS, elapsed), len(DURATION_BUCKETS)):
+                stats.buckets[i] += 1
+        if app.debug and queries > app.config['QUERY_BUDGET']:
+            repeated = '; '.join(f'{count}x {sql[:80]}' for sql, count in statements.most_common(3) if count > 1)
+            app.logger.warning(f"{endpoint} issued {queries} queries (budget {app.config['QUERY_BUDGET']}, "
+                               f"{duplicates} duplicates){': ' + repeated if repeated else ''}")
+
+    def prometheus(self):
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = []
+            for name, kind, help_text, field in self.METRICS:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                lines += [f'{name}{{endpoint="{endpoint}"}} {getattr(entry, field)}' for endpoint, entry in stats]
+            lines += ['# HELP garden_request_duration_seconds Wall time per request',
+                      '# TYPE garden_request_duration_seconds histogram']
+            for endpoint, entry in stats:
+                for bound, count in zip(DURATION_BUCKETS, entry.buckets):
+                    lines.append(f'garden_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines += [f'garden_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {entry.requests}',
+                          f'garden_request_duration_seconds_sum{{endpoint="{endpoint}"}} {entry.seconds}',
+                          f'garden_request_duration_seconds_count{{endpoint="{endpoint}"}} {entry.requests}']
+        return '\n'.join(lines) + '\n'
+
+profiler = QueryProfiler()
+
+# The start time lives on the execution context, which is discarded with the
+# statement; a stack in conn.info would keep an entry for every statement that raised
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profile_started', None)
+    profile = g.get('query_profile') if has_app_context() else None
+    if profile is not None and started is not None:
+        profile['statements'][statement] += 1
+        profile['db_seconds'] += time.perf_counter() - started
+
+with app.app_context():
+    for _engine in db.engines.values():
+        db.event.listen(_engine, 'before_cursor_execute', _before_cursor_execute)
+        db.event.listen(_engine, 'after_cursor_execute', _after_cursor_execute)
+
+@app.before_request
+def start_query_profile():
+    profiler.start()
+
+@app.teardown_request
+def finish_query_profile(exc):
+    profiler.finish(request.endpoint or 'unmatched')
+
+def socket_event(name):
+    """socketio.on() that also profiles the handler under 'socket:<name>'."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            profiler.start()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                profiler.finish(f'socket:{name}')
+        return socketio.on(name)(wrapper)
+    return decorator
 
 # Helper Functions
 def calculate_level(xp):
     return int(xp ** 0.5 / 5) + 1
 
-def extract_keywords(content):
-    words = content.split()
-    keywords = [word.strip('.,!?:;"()').lower() for word in words if len(word.strip('.,!?:;"()')) > 3]
-    return list(set(keywords))
+DEFAULT_PROMPTS = [
+    "What challenges did you overcome today?",
+    "What new ideas or insights did you gain?",
+    "How did you collaborate with others today?"
+]
+
+DailyPrompt = namedtuple('DailyPrompt', 'id text')
+_daily_prompt = (None, None)
 
 def get_daily_prompt():
+    # Picked once per UTC day from the ordered daily prompts, so every worker
+    # lands on the same one without writing anything
+    global _daily_prompt
     today = datetime.utcnow().date()
-    prompt = Prompt.query.filter_by(is_daily=True).filter(
-        (Prompt.used_at == None) | (Prompt.used_at < today)
-    ).first()
-    if not prompt:
-        prompts = [
-            "What challenges did you overcome today?",
-            "What new ideas or insights did you gain?",
-            "How did you collaborate with others today?"
-        ]
-        prompt = Prompt(text=random.choice(prompts), is_daily=True)
-        db.session.add(prompt)
-        db.session.commit()
-    prompt.used_at = datetime.utcnow()
-    db.session.commit()
+    cached_day, prompt = _daily_prompt
+    if cached_day == today:
+        return prompt
+    prompts = db.session.query(Prompt.id, Prompt.text).filter_by(is_daily=True).order_by(Prompt.id).all()
+    if prompts:
+        prompt = DailyPrompt(*prompts[today.toordinal() % len(prompts)])
+    else:
+        prompt = DailyPrompt(None, DEFAULT_PROMPTS[today.toordinal() % len(DEFAULT_PROMPTS)])
+    _daily_prompt = (today, prompt)
     return prompt
 
-def award_badges(user):
-    if user.streak >= 7 and not UserBadge.query.filter_by(user_id=user.id, badge_id=1).first():
-        badge = Badge.query.get(1)
-        if badge:
-            user_badge = UserBadge(user_id=user.id, badge_id=badge.id)
-            db.session.add(user_badge)
-            socketio.emit('new_badge', {
-                'userId': user.id,
-                'badge_id': badge.id,
-                'badge_name': badge.name
-            }, room=f'user_{user.id}')
-    db.session.commit()
-
 def create_plant_for_reflection(user, reflection):
+    # Only builds the plant; the caller owns the transaction and emits after commit
     word_count = len(reflection.content.split())
     if word_count < 50:
-        plant_type = PlantType.query.filter_by(name='Sunflower').first()
+        plant_type = catalog.plant_type_named('Sunflower')
     elif word_count < 200:
-        plant_type = PlantType.query.filter_by(name='Knowledge Shrub').first()
+        plant_type = catalog.plant_type_named('Knowledge Shrub')
     else:
-        plant_type = PlantType.query.filter_by(name='Wisdom Tree').first()
-    if plant_type:
-        plant = UserPlant(
-            user_id=user.id,
-            plant_type_id=plant_type.id,
-            current_stage=0,
-            group_id=reflection.group_id
-        )
-        db.session.add(plant)
-        db.session.commit()
+        plant_type = catalog.plant_type_named('Wisdom Tree')
+    if not plant_type:
+        return None
+    return UserPlant(
+        user_id=user.id,
+        plant_type_id=plant_type.id,
+        current_stage=0,
+        group_id=reflection.group_id
+    )
 
-        target_room = f'group_{reflection.group_id}' if reflection.group_id else f'user_{user.id}'
-        socketio.emit('new_plant', {
-            'user_id': user.id,
-            'plant_id': plant.id,
-            'plant_type': plant_type.name,
-            'image': plant_type.stages.get(str(plant.current_stage))
-        }, room=target_room)
+def emit_new_plant(user, plant):
+    target_room = f'group_{plant.group_id}' if plant.group_id else f'user_{user.id}'
+    plant_type = catalog.plant_type(plant.plant_type_id)
+    queue_emit('new_plant', {
+        'user_id': user.id,
+        'plant_id': plant.id,
+        'plant_type': plant_type.name,
+        'image': plant_type.image(plant.current_stage)
+    }, room=target_room)
 
-        # Refresh personal garden
-        socketio.emit('garden_update', {'userId': user.id}, room=f'user_{user.id}')
+    # Refresh personal garden
+    queue_emit('garden_update', {'userId': user.id}, room=f'user_{user.id}')
 
 # Database Models
 class User(UserMixin, db.Model):
@@ -110,6 +377,8 @@ class User(UserMixin, db.Model):
     pseudonym = db.Column(db.String(80))
     quote = db.Column(db.Text)
     pronouns = db.Column(db.String(50))
+    # Bumped by any plant, badge or XP change; drives /api/garden-state ETags
+    garden_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     reflections = db.relationship('Reflection', backref='author', lazy=True)
     badges = db.relationship('UserBadge', backref='user', lazy=True)
     plants = db.relationship('UserPlant', backref='owner', lazy=True)
@@ -122,21 +391,31 @@ class User(UserMixin, db.Model):
         self.password_hash = generate_password_hash(password)
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
-    def update_streak(self):
-        today = datetime.utcnow().date()
+    def update_streak(self, commit=True):
+        """Record today's activity; returns False (and writes nothing) if already recorded."""
+        now = datetime.utcnow()
+        today = now.date()
         if self.last_active:
             last_active_date = self.last_active.date()
+            if last_active_date >= today:
+                return False
             if today - last_active_date == timedelta(days=1):
                 self.streak += 1
-            elif today > last_active_date + timedelta(days=1):
+            else:
                 self.streak = 1
         else:
             self.streak = 1
-        self.last_active = datetime.utcnow()
-        db.session.commit()
+        self.last_active = now
+        if commit:
+            db.session.commit()
+        return True
 
 class Reflection(db.Model):
     __tablename__ = 'reflections'
+    __table_args__ = (
+        db.Index('ix_reflections_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_reflections_group_id_created_at', 'group_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -146,11 +425,16 @@ class Reflection(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'))
     prompt_id = db.Column(db.Integer, db.ForeignKey('prompts.id'))
     keywords = db.Column(db.JSON)
+    # Denormalized feed counters, maintained by the Vote/Comment listeners below
+    vote_total = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     comments = db.relationship('Comment', backref='reflection', lazy=True)
     votes = db.relationship('Vote', backref='reflection', lazy=True)
     tags = db.relationship('ReflectionTag', backref='reflection', lazy=True)
+    search_keywords = db.relationship('ReflectionKeyword', backref='reflection', lazy=True,
+                                      cascade='all, delete-orphan')
     goal = db.relationship('Goal', backref='reflection', uselist=False, lazy=True)
 
 class Comment(db.Model):
@@ -170,6 +454,28 @@ class Vote(db.Model):
     value = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+def _bump_reflection(connection, reflection_id, **deltas):
+    table = Reflection.__table__
+    connection.execute(table.update().where(table.c.id == reflection_id).values(
+        **{col: table.c[col] + delta for col, delta in deltas.items()}
+    ))
+
+@db.event.listens_for(Comment, 'after_insert')
+def _comment_added(mapper, connection, comment):
+    _bump_reflection(connection, comment.reflection_id, comment_count=1)
+
+@db.event.listens_for(Comment, 'after_delete')
+def _comment_removed(mapper, connection, comment):
+    _bump_reflection(connection, comment.reflection_id, comment_count=-1)
+
+@db.event.listens_for(Vote, 'after_insert')
+def _vote_added(mapper, connection, vote):
+    _bump_reflection(connection, vote.reflection_id, vote_total=vote.value or 0)
+
+@db.event.listens_for(Vote, 'after_delete')
+def _vote_removed(mapper, connection, vote):
+    _bump_reflection(connection, vote.reflection_id, vote_total=-(vote.value or 0))
+
 class PlantType(db.Model):
     __tablename__ = 'plant_types'
     id = db.Column(db.Integer, primary_key=True)
@@ -181,6 +487,10 @@ class PlantType(db.Model):
 
 class UserPlant(db.Model):
     __tablename__ = 'user_plants'
+    __table_args__ = (
+        db.Index('ix_user_plants_user_id', 'user_id'),
+        db.Index('ix_user_plants_group_id', 'group_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     plant_type_id = db.Column(db.Integer, db.ForeignKey('plant_types.id'), nullable=False)
@@ -189,15 +499,30 @@ class UserPlant(db.Model):
     last_watered = db.Column(db.DateTime, default=datetime.utcnow)
     plant_type = db.relationship('PlantType')
     group_id = db.Column(db.Integer, nullable=True)
+    # Owner's garden_version when this plant last changed, for ?since= deltas
+    garden_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
-    def to_dict(self):
+    def to_dict(self, stage=None):
+        # `stage` is the grown stage including pending waterings (see plants_to_dicts)
+        plant_type = catalog.plant_type(self.plant_type_id)
+        stage = self.current_stage if stage is None else stage
         return {
             'id': self.id,
-            'name': self.plant_type.name,
-            'stage': self.current_stage,
-            'image': self.plant_type.stages.get(str(self.current_stage))
+            'name': plant_type.name,
+            'stage': stage,
+            'image': plant_type.image(stage)
         }
 
+class PlantWatering(db.Model):
+    # Append-only watering log, replayed on read and folded into user_plants by compact_waterings
+    __tablename__ = 'plant_waterings'
+    __table_args__ = (db.Index('ix_plant_waterings_plant_id_id', 'plant_id', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    plant_id = db.Column(db.Integer, db.ForeignKey('user_plants.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    group_id = db.Column(db.Integer, nullable=True)
+    watered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
 class Badge(db.Model):
     __tablename__ = 'badges'
     id = db.Column(db.Integer, primary_key=True)
@@ -208,6 +533,7 @@ class Badge(db.Model):
 
 class UserBadge(db.Model):
     __tablename__ = 'user_badges'
+    __table_args__ = (db.Index('uq_user_badges_user_id_badge_id', 'user_id', 'badge_id', unique=True),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     badge_id = db.Column(db.Integer, db.ForeignKey('badges.id'), nullable=False)
@@ -226,31 +552,15 @@ class Group(db.Model):
     reflections = db.relationship('Reflection', backref='group', lazy=True)
     goals = db.relationship('Goal', backref='group', lazy=True, foreign_keys='Goal.group_id')
 
-    def get_garden_plants(self):
-        try:
-            return UserPlant.query.filter_by(group_id=self.id).all()
-        except Exception as e:
-            current_app.logger.error(f"Error fetching garden plants for group {self.id}: {e}")
-            return []
-
     def to_dict(self):
-        try:
-            garden_plants = [plant.to_dict() for plant in self.get_garden_plants()]
-        except Exception:
-            garden_plants = []
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'class_name': self.class_name,
-            'memberCount': len(self.members),
-            'reflectionCount': len(self.reflections),
-            'goalCount': len(self.goals),
-            'gardenState': {'plants': garden_plants}
-        }
+        return serialize_groups([self])[0]
 
 class GroupMember(db.Model):
     __tablename__ = 'group_members'
+    __table_args__ = (
+        db.Index('ix_group_members_user_id_group_id', 'user_id', 'group_id'),
+        db.Index('ix_group_members_group_id_user_id', 'group_id', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False)
@@ -259,6 +569,11 @@ class GroupMember(db.Model):
 
 class Goal(db.Model):
     __tablename__ = 'goals'
+    __table_args__ = (
+        db.Index('ix_goals_created_by_type', 'created_by', 'type'),
+        db.Index('ix_goals_created_by_created_at', 'created_by', 'created_at'),
+        db.Index('ix_goals_group_id_created_at', 'group_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -300,6 +615,787 @@ class ReflectionTag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     reflection_id = db.Column(db.Integer, db.ForeignKey('reflections.id'), nullable=False)
     tag = db.Column(db.String(50), nullable=False)
+    __table_args__ = (db.Index('ix_reflection_tags_reflection_id', 'reflection_id'),)
+
+class ReflectionKeyword(db.Model):
+    # Inverted index for /api/reflections/search: one row per (keyword, reflection)
+    __tablename__ = 'reflection_keywords'
+    __table_args__ = (db.Index('ix_reflection_keywords_keyword_reflection_id', 'keyword', 'reflection_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    reflection_id = db.Column(db.Integer, db.ForeignKey('reflections.id'), nullable=False)
+    keyword = db.Column(db.String(100), nullable=False)
+
+# Garden simulation (see garden.py)
+def pending_waterings(plant_ids):
+    pending = {}
+    if plant_ids:
+        for plant_id, watered_at in db.session.query(PlantWatering.plant_id, PlantWatering.watered_at).filter(
+                PlantWatering.plant_id.in_(plant_ids)).order_by(PlantWatering.id):
+            pending.setdefault(plant_id, []).append(watered_at)
+    return pending
+
+def grown_plants(plants):
+    """Pair each plant with its stage after replaying pending waterings (one query)."""
+    pending = pending_waterings([p.id for p in plants])
+    return [(p, garden.replay(p.current_stage, p.last_watered, pending.get(p.id, ()),
+                              catalog.plant_type(p.plant_type_id).max_stage)[0]) for p in plants]
+
+def compact_waterings(user_id=None, batch_size=5000):
+    """Fold pending waterings into user_plants; returns the number of events compacted.
+
+    Snapshots are overwritten with absolute values, so concurrent compactions
+    of the same events converge on the same result.
+    """
+    query = db.session.query(PlantWatering.id, PlantWatering.plant_id, PlantWatering.watered_at)
+    if user_id is not None:
+        query = query.filter(PlantWatering.user_id == user_id)
+    events = query.order_by(PlantWatering.id).limit(batch_size).all()
+    if not events:
+        return 0
+    by_plant = {}
+    for _, plant_id, watered_at in events:
+        by_plant.setdefault(plant_id, []).append(watered_at)
+    snapshots = []
+    for plant in UserPlant.query.filter(UserPlant.id.in_(by_plant)):
+        stage, last_watered = garden.replay(plant.current_stage, plant.last_watered, by_plant[plant.id],
+                                            catalog.plant_type(plant.plant_type_id).max_stage)
+        snapshots.append({'_id': plant.id, '_stage': stage, '_last_watered': last_watered})
+    table = UserPlant.__table__
+    if snapshots:
+        db.session.execute(table.update().where(table.c.id == bindparam('_id')).values(
+            current_stage=bindparam('_stage'), last_watered=bindparam('_last_watered')), snapshots)
+    db.session.query(PlantWatering).filter(PlantWatering.id.in_([event_id for event_id, _, _ in events])).delete()
+    db.session.commit()
+    return len(events)
+
+class WateringCompactor:
+    """Background task that compacts the watering log every `interval` seconds."""
+    def __init__(self, interval=30):
+        self.interval = interval
+        self._started = False
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    socketio.start_background_task(self._run)
+                    self._started = True
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            with app.app_context():
+                try:
+                    while compact_waterings():
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"Watering compaction failed: {e}")
+
+watering_compactor = WateringCompactor()
+
+# Reference data catalog
+class PlantTypeEntry(namedtuple('PlantTypeEntry', 'id name rarity xp_value unlock_condition max_stage images')):
+    def image(self, stage):
+        return self.images.get(stage)
+
+BadgeEntry = namedtuple('BadgeEntry', 'id name description icon criteria')
+
+class Catalog:
+    """In-memory copy of the PlantType and Badge tables.
+
+    Loaded on first use and reloaded lazily after any commit in this process
+    that writes to either table (see the session listeners below). Rows
+    written elsewhere (another worker, flask shell, seed scripts) show up
+    after `refresh_interval` seconds, or at once when a lookup misses.
+    `generation` counts loads so derived caches know when to rebuild.
+    """
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.generation = 0
+        self._loaded_version = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._plant_types, self._plant_types_by_name = {}, {}
+        self._badges, self._badges_by_name = {}, {}
+
+    def invalidate(self):
+        self.version += 1
+
+    def ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if (self._loaded_version != self.version or loaded_at is None
+                or time.monotonic() - loaded_at >= self.refresh_interval):
+            self._load(loaded_at)
+
+    def _load(self, seen_loaded_at):
+        with self._lock:
+            # Another thread reloaded since the caller looked; its snapshot will do
+            if self._loaded_at != seen_loaded_at and self._loaded_version == self.version:
+                return
+            version = self.version
+            plant_types = {}
+            for pt in PlantType.query.all():
+                images = {int(k): plant_image_url(v) for k, v in (pt.stages or {}).items()}
+                plant_types[pt.id] = PlantTypeEntry(pt.id, pt.name, pt.rarity, pt.xp_value, pt.unlock_condition,
+                                                    max(images, default=0), images)
+            badges = {b.id: BadgeEntry(b.id, b.name, b.description, b.icon, b.criteria or {})
+                      for b in Badge.query.all()}
+            self._plant_types = plant_types
+            self._plant_types_by_name = {pt.name: pt for pt in plant_types.values()}
+            self._badges = badges
+            self._badges_by_name = {b.name: b for b in badges.values()}
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+            self.generation += 1
+
+    def _get(self, table, key):
+        self.ensure_loaded()
+        loaded_at = self._loaded_at
+        entry = getattr(self, table).get(key)
+        if entry is None:
+            # Probably added by another process since the last load: reload once
+            self._load(loaded_at)
+            entry = getattr(self, table).get(key)
+        return entry
+
+    def plant_type(self, plant_type_id):
+        return self._get('_plant_types', plant_type_id)
+
+    def plant_type_named(self, name):
+        return self._get('_plant_types_by_name', name)
+
+    def badge(self, badge_id):
+        return self._get('_badges', badge_id)
+
+    def badge_named(self, name):
+        return self._get('_badges_by_name', name)
+
+    def badges(self):
+        self.ensure_loaded()
+        return list(self._badges.values())
+
+catalog = Catalog()
+
+# Badge engine
+# Badge.criteria maps a stat to a threshold, e.g. {"streak": 7} or
+# {"reflections": {"gte": 10}, "groups": {"gte": 1}}; every entry must hold.
+CRITERIA_OPS = {'gte': operator.ge, 'gt': operator.gt, 'eq': operator.eq, 'lte': operator.le, 'lt': operator.lt}
+
+# Badges that predate the criteria column keep their hard-coded rule
+LEGACY_CRITERIA = {1: {'streak': 7}}
+
+# Which stats each event can move; only rules reading one of them are evaluated
+EVENT_STATS = {
+    'activity': {'streak'},
+    'reflection_posted': {'reflections', 'xp', 'level', 'streak', 'plants'},
+    'goal_completed': {'goals_completed'},
+    'plant_watered': {'bloomed'},
+    'group_joined': {'groups'},
+}
+
+USER_STATS = {
+    'streak': lambda user: user.streak or 0,
+    'xp': lambda user: user.xp or 0,
+    'level': lambda user: user.level or 1,
+    'reflections': lambda user: Reflection.query.filter_by(user_id=user.id).count(),
+    'goals_completed': lambda user: Goal.query.filter_by(created_by=user.id, status='completed').count(),
+    'groups': lambda user: GroupMember.query.filter_by(user_id=user.id).count(),
+    'plants': lambda user: UserPlant.query.filter_by(user_id=user.id).count(),
+    'bloomed': lambda user: sum(
+        1 for plant, stage in grown_plants(UserPlant.query.filter_by(user_id=user.id).all())
+        if stage >= catalog.plant_type(plant.plant_type_id).max_stage
+    ),
+}
+
+BadgeRule = namedtuple('BadgeRule', 'badge stats predicate')
+
+def compile_criteria(criteria):
+    checks = []
+    for stat, bound in criteria.items():
+        if stat not in USER_STATS:
+            raise ValueError(f'Unknown badge stat: {stat}')
+        if not isinstance(bound, dict):
+            bound = {'gte': bound}
+        for op, value in bound.items():
+            # Checked here so a bad threshold skips the badge instead of failing evaluate()
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'Threshold for {stat} must be a number, not {value!r}')
+            checks.append((stat, CRITERIA_OPS[op], value))
+    return frozenset(stat for stat, _, _ in checks), lambda stats: all(op(stats[stat], value) for stat, op, value in checks)
+
+class BadgeEngine:
+    def __init__(self):
+        self._rules_version = None
+        self._rules_by_stat = {}
+        self._earned = {}
+
+    def _rules(self):
+        catalog.ensure_loaded()
+        generation = catalog.generation
+        if self._rules_version != generation:
+            rules_by_stat = {}
+            for badge in catalog.badges():
+                criteria = badge.criteria or LEGACY_CRITERIA.get(badge.id)
+                if not criteria:
+                    continue
+                try:
+                    stats, predicate = compile_criteria(criteria)
+                except (ValueError, KeyError, AttributeError) as e:
+                    current_app.logger.error(f"Skipping badge {badge.id} with bad criteria: {e}")
+                    continue
+                rule = BadgeRule(badge, stats, predicate)
+                for stat in stats:
+                    rules_by_stat.setdefault(stat, []).append(rule)
+            self._rules_by_stat = rules_by_stat
+            self._rules_version = generation
+        return self._rules_by_stat
+
+    def load_earned(self, user_ids):
+        # One query for every user not cached yet, instead of one each
+        missing = [user_id for user_id in user_ids if user_id not in self._earned]
+        if missing:
+            earned = {user_id: set() for user_id in missing}
+            for user_id, badge_id in db.session.execute(
+                    select(UserBadge.user_id, UserBadge.badge_id).where(UserBadge.user_id.in_(missing))):
+                earned[user_id].add(badge_id)
+            self._earned.update(earned)
+
+    def earned(self, user_id):
+        if user_id not in self._earned:
+            self._earned[user_id] = {badge_id for (badge_id,) in
+                                     db.session.query(UserBadge.badge_id).filter_by(user_id=user_id)}
+        return self._earned[user_id]
+
+    def evaluate(self, user, event):
+        """Add UserBadge rows for every badge `event` newly earns; the caller commits."""
+        rules_by_stat = self._rules()
+        candidates = {rule.badge.id: rule for stat in EVENT_STATS[event] for rule in rules_by_stat.get(stat, ())}
+        if not candidates:
+            return []
+        pending = db.session.info.setdefault('awarded_badges', {}).setdefault(user.id, set())
+        earned = self.earned(user.id) | pending
+        candidates = [rule for badge_id, rule in candidates.items() if badge_id not in earned]
+        stats = {}
+        awarded = []
+        for rule in candidates:
+            for stat in rule.stats - stats.keys():
+                stats[stat] = USER_STATS[stat](user)
+            if rule.predicate(stats):
+                awarded.append(rule.badge)
+        if awarded:
+            try:
+                # Savepoint so a concurrent award (unique user_id, badge_id) can't sink the caller's transaction
+                with db.session.begin_nested():
+                    db.session.execute(insert(UserBadge), [
+                        {'user_id': user.id, 'badge_id': badge.id, 'earned_at': datetime.utcnow()} for badge in awarded
+                    ])
+            except IntegrityError:
+                self._earned.pop(user.id, None)
+                return []
+            bump_garden_version(db.session, user.id)
+            # Cached as earned only once the caller's commit succeeds
+            pending.update(badge.id for badge in awarded)
+        return awarded
+
+    def committed(self, awarded):
+        for user_id, badge_ids in awarded.items():
+            if user_id in self._earned:
+                self._earned[user_id] |= badge_ids
+
+badge_engine = BadgeEngine()
+
+# after_commit/after_rollback also fire when a savepoint ends; only the
+# outermost transaction settles anything
+@db.event.listens_for(Session, 'after_commit')
+def _cache_awarded_badges(session):
+    if not session.in_nested_transaction():
+        badge_engine.committed(session.info.pop('awarded_badges', {}))
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_awarded_badges(session):
+    if not session.in_nested_transaction():
+        session.info.pop('awarded_badges', None)
+
+def award_badges(user, event):
+    return badge_engine.evaluate(user, event)
+
+def award_badges_many(users, event):
+    """award_badges for each user; returns {user_id: badges} for those who earned any."""
+    badge_engine.load_earned([user.id for user in users])
+    awarded = {}
+    for user in users:
+        badges = badge_engine.evaluate(user, event)
+        if badges:
+            awarded[user.id] = badges
+    return awarded
+
+def emit_new_badges(user_id, badges):
+    for badge in badges:
+        queue_emit('new_badge', {
+            'userId': user_id,
+            'badge_id': badge.id,
+            'badge_name': badge.name
+        }, room=f'user_{user_id}')
+
+# Leaderboards
+class Leaderboard:
+    """Users ordered by XP (desc) then id; ranks and top-k are bisects/slices."""
+    def __init__(self):
+        self._keys = []
+        self._xp = {}
+
+    @classmethod
+    def from_scores(cls, xp_by_user):
+        # One sort instead of an insort per user, which is quadratic on a full rebuild
+        board = cls()
+        board._xp = dict(xp_by_user)
+        board._keys = sorted((-xp, user_id) for user_id, xp in board._xp.items())
+        return board
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return user_id in self._xp
+
+    def xp(self, user_id):
+        return self._xp.get(user_id)
+
+    def update(self, user_id, xp):
+        old = self._xp.get(user_id)
+        if old == xp:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        insort(self._keys, (-xp, user_id))
+        self._xp[user_id] = xp
+
+    def rank(self, user_id):
+        xp = self._xp.get(user_id)
+        return None if xp is None else bisect_left(self._keys, (-xp, user_id)) + 1
+
+    def top(self, k):
+        return [(user_id, -neg_xp) for neg_xp, user_id in self._keys[:k]]
+
+class Leaderboards:
+    """Global, per-group and per-class boards held in memory.
+
+    Updated in place when this process awards XP or adds members, and
+    rebuilt from the database every `refresh_interval` seconds so boards in
+    other workers converge. Only the first load happens in a request; later
+    rebuilds run in a background task and requests keep reading the previous
+    snapshot until the finished one is swapped in.
+    """
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._build_lock:
+                if self._loaded_at is None:
+                    self._rebuild()
+        elif time.monotonic() - self._loaded_at >= self.refresh_interval and not self._refreshing:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            socketio.start_background_task(self._refresh)
+
+    def _refresh(self):
+        try:
+            with app.app_context(), self._build_lock:
+                self._rebuild()
+        except Exception as e:
+            app.logger.error(f"Leaderboard rebuild failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def _rebuild(self):
+        # Core selects on the tables: plain tuples, no ORM row processing
+        users, memberships_t, groups_t = User.__table__, GroupMember.__table__, Group.__table__
+        connection = db.session.connection()
+        scores, usernames = {}, {}
+        for user_id, username, xp in connection.execute(select(users.c.id, users.c.username, users.c.xp)):
+            scores[user_id] = xp or 0
+            usernames[user_id] = username
+        group_scores, class_scores, memberships = {}, {}, {}
+        for user_id, group_id, class_name in connection.execute(
+                select(memberships_t.c.user_id, memberships_t.c.group_id, groups_t.c.class_name).join_from(
+                    memberships_t, groups_t, groups_t.c.id == memberships_t.c.group_id)):
+            xp = scores.get(user_id, 0)
+            group_scores.setdefault(group_id, {})[user_id] = xp
+            if class_name:
+                class_scores.setdefault(class_name, {})[user_id] = xp
+            memberships.setdefault(user_id, set()).add((group_id, class_name))
+        global_board = Leaderboard.from_scores(scores)
+        groups = {group_id: Leaderboard.from_scores(members) for group_id, members in group_scores.items()}
+        classes = {name: Leaderboard.from_scores(members) for name, members in class_scores.items()}
+        with self._lock:
+            self.global_board, self.usernames = global_board, usernames
+            self.groups, self.classes, self._memberships = groups, classes, memberships
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _place(groups, classes, memberships, global_board, user_id, group_id, class_name):
+        xp = global_board.xp(user_id) or 0
+        groups.setdefault(group_id, Leaderboard()).update(user_id, xp)
+        if class_name:
+            classes.setdefault(class_name, Leaderboard()).update(user_id, xp)
+        memberships.setdefault(user_id, set()).add((group_id, class_name))
+
+    def record(self, user):
+        self._ensure_loaded()
+        with self._lock:
+            self.usernames[user.id] = user.username
+            self.global_board.update(user.id, user.xp)
+            for group_id, class_name in self._memberships.get(user.id, ()):
+                self.groups[group_id].update(user.id, user.xp)
+                if class_name:
+                    self.classes[class_name].update(user.id, user.xp)
+
+    def add_members(self, group_id, class_name, user_ids):
+        self._ensure_loaded()
+        with self._lock:
+            for user_id in user_ids:
+                self._place(self.groups, self.classes, self._memberships, self.global_board,
+                            user_id, group_id, class_name)
+
+    def board(self, scope, key=None):
+        self._ensure_loaded()
+        if scope == 'group':
+            return self.groups.get(key)
+        if scope == 'class':
+            return self.classes.get(key)
+        return self.global_board
+
+    def to_dict(self, board, user_id, limit):
+        with self._lock:
+            top = board.top(limit)
+            rank = board.rank(user_id)
+        return {
+            'top': [{'rank': i, 'user_id': uid, 'username': self.usernames.get(uid), 'xp': xp,
+                     'level': calculate_level(xp)} for i, (uid, xp) in enumerate(top, 1)],
+            'me': {'rank': rank, 'xp': board.xp(user_id)} if rank else None,
+            'total': len(board)
+        }
+
+leaderboards = Leaderboards()
+
+# User directory
+# Usernames sorted case-insensitively so a prefix search is a bisect plus a
+# short scan. New registrations are inserted in place; a periodic reload
+# picks up users registered through other workers.
+class UserDirectory:
+    """Sorted (lowercased username, username, id) entries for typeahead search.
+
+    Only the first load happens in a request; every `refresh_interval`
+    seconds a background task reloads the table and swaps the new snapshot
+    in, the same way Leaderboards refreshes. Users registered in this
+    process while a reload is running are merged into its result.
+    """
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._loaded_at = None
+        self._entries = []
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+        self._added = []
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._build_lock:
+                if self._loaded_at is None:
+                    self._rebuild()
+        elif time.monotonic() - self._loaded_at >= self.refresh_interval and not self._refreshing:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+                self._added = []
+            socketio.start_background_task(self._refresh)
+
+    def _refresh(self):
+        try:
+            with app.app_context(), self._build_lock:
+                self._rebuild()
+        except Exception as e:
+            app.logger.error(f"User directory rebuild failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def _rebuild(self):
+        # Covered by the unique username index; no table rows are read
+        entries = sorted((username.lower(), username, user_id)
+                         for user_id, username in db.session.execute(select(User.id, User.username)))
+        with self._lock:
+            for entry in self._added:
+                self._insert(entries, entry)
+            self._entries, self._added = entries, []
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _insert(entries, entry):
+        index = bisect_left(entries, entry)
+        if index == len(entries) or entries[index] != entry:
+            entries.insert(index, entry)
+
+    def add(self, user):
+        self._ensure_loaded()
+        entry = (user.username.lower(), user.username, user.id)
+        with self._lock:
+            # Copy on write: search() walks the current list without the lock
+            entries = list(self._entries)
+            self._insert(entries, entry)
+            self._entries = entries
+            if self._refreshing:
+                self._added.append(entry)
+
+    def search(self, prefix, after=None, limit=20, exclude=None):
+        """Up to `limit` (id, username) pairs whose username starts with `prefix`,
+        resuming after the username `after`; also returns whether more remain."""
+        self._ensure_loaded()
+        prefix = prefix.lower()
+        start = (after.lower(), after) if after else (prefix,)
+        results = []
+        with self._lock:
+            entries = self._entries
+        index = bisect_left(entries, start)
+        if after and index < len(entries) and entries[index][:2] == start:
+            index += 1
+        for key, username, user_id in entries[index:]:
+            if not key.startswith(prefix):
+                return results, False
+            if user_id != exclude:
+                if len(results) == limit:
+                    return results, True
+                results.append((user_id, username))
+        return results, False
+
+user_directory = UserDirectory()
+
+# Group summaries (counts + shared garden) keyed by group id, as (expires_at,
+# summary). Entries are dropped after any commit in this process that touched
+# the group or its scoped rows; the TTL bounds how stale writes made by other
+# workers can look.
+GROUP_SUMMARY_TTL = 10
+_group_summaries = {}
+
+def serialize_groups(groups):
+    now = time.monotonic()
+    cached = {}
+    for g in groups:
+        entry = _group_summaries.get(g.id)
+        if entry and entry[0] > now:
+            cached[g.id] = entry[1]
+    missing = [g for g in groups if g.id not in cached]
+    if missing:
+        ids = [g.id for g in missing]
+        counts = db.session.execute(select(
+            Group.id,
+            select(func.count(GroupMember.id)).where(GroupMember.group_id == Group.id).scalar_subquery(),
+            select(func.count(Reflection.id)).where(Reflection.group_id == Group.id).scalar_subquery(),
+            select(func.count(Goal.id)).where(Goal.group_id == Group.id).scalar_subquery()
+        ).where(Group.id.in_(ids)))
+        counts = {row[0]: row[1:] for row in counts}
+        plants = {}
+        for plant, stage in grown_plants(UserPlant.query.filter(UserPlant.group_id.in_(ids)).all()):
+            plants.setdefault(plant.group_id, []).append(plant.to_dict(stage))
+        for g in missing:
+            member_count, reflection_count, goal_count = counts.get(g.id, (0, 0, 0))
+            cached[g.id] = {
+                'id': g.id,
+                'name': g.name,
+                'description': g.description,
+                'class_name': g.class_name,
+                'memberCount': member_count,
+                'reflectionCount': reflection_count,
+                'goalCount': goal_count,
+                'gardenState': {'plants': plants.get(g.id, [])}
+            }
+            _group_summaries[g.id] = (now + GROUP_SUMMARY_TTL, cached[g.id])
+    return [cached[g.id] for g in groups]
+
+_GROUP_SCOPED = (Reflection, Goal, GroupMember, UserPlant, PlantWatering)
+
+# Group creation
+# Single and bulk creation share one path: members are resolved with one
+# query per kind of reference, groups and memberships are inserted with
+# executemany in a single transaction, and group_created only goes to the
+# members' own rooms.
+def _split_member_refs(members):
+    # Only JSON integers are ids. Strings are usernames, even all-digit ones
+    # ("2024"); those fall back to an id when no such username exists, which
+    # is how CSV files refer to users by id. Anything else (true, 1.5, ...) is unknown.
+    ids, usernames, invalid = [], [], []
+    for ref in members or ():
+        if isinstance(ref, int) and not isinstance(ref, bool):
+            ids.append(ref)
+        elif isinstance(ref, str) and ref.strip():
+            usernames.append(ref.strip())
+        elif ref not in ('', None):
+            invalid.append(ref)
+    return ids, usernames, invalid
+
+def create_groups(creator, specs, skip_existing=True):
+    """Create groups from dicts with name, description, class_name and members
+    (integer user ids or usernames). Returns (created summaries, skipped, unknown members)."""
+    refs = [_split_member_refs(spec.get('members')) for spec in specs]
+    all_names = {name for _, names, _ in refs for name in names}
+    all_ids = {user_id for ids, _, _ in refs for user_id in ids} | {int(name) for name in all_names if name.isdigit()}
+    known_ids = set(db.session.scalars(select(User.id).where(User.id.in_(all_ids)))) if all_ids else set()
+    ids_by_name = dict(db.session.execute(select(User.username, User.id).where(User.username.in_(all_names))).all()) if all_names else {}
+    existing = set()
+    if skip_existing:
+        # Same rule as duplicates within the import: names compare case-insensitively
+        names = {(spec.get('name') or '').strip().lower() for spec in specs}
+        existing = {(name.lower(), class_name) for name, class_name in db.session.execute(
+            select(Group.name, Group.class_name).where(func.lower(Group.name).in_(names)))}
+
+    rows, member_lists, skipped, unknown, seen = [], [], [], [], set()
+    for spec, (ids, usernames, invalid) in zip(specs, refs):
+        name = (spec.get('name') or '').strip()
+        class_name = (spec.get('class_name') or '').strip() or None
+        if not name:
+            skipped.append({'name': name, 'class_name': class_name, 'reason': 'Group name is required'})
+            continue
+        if (name.lower(), class_name) in seen:
+            skipped.append({'name': name, 'class_name': class_name, 'reason': 'Duplicate group in import'})
+            continue
+        if (name.lower(), class_name) in existing:
+            skipped.append({'name': name, 'class_name': class_name, 'reason': 'Group already exists'})
+            continue
+        seen.add((name.lower(), class_name))
+        members = {creator.id: None}
+        for user_id in ids:
+            if user_id in known_ids:
+                members[user_id] = None
+            else:
+                unknown.append({'group': name, 'member': user_id})
+        for username in usernames:
+            if username in ids_by_name:
+                members[ids_by_name[username]] = None
+            elif username.isdigit() and int(username) in known_ids:
+                members[int(username)] = None
+            else:
+                unknown.append({'group': name, 'member': username})
+        unknown.extend({'group': name, 'member': ref} for ref in invalid)
+        rows.append({'name': name, 'description': spec.get('description'), 'class_name': class_name,
+                     'created_by': creator.id, 'created_at': datetime.utcnow()})
+        member_lists.append(list(members))
+    if not rows:
+        return [], skipped, unknown
+
+    # (name, class_name) is unique within the batch, so rows are matched back by
+    # it; asking for parameter order would make SQLite insert one row at a time
+    inserted = db.session.execute(insert(Group).returning(Group.id, Group.name, Group.class_name), rows)
+    ids_by_key = {(name, class_name): group_id for group_id, name, class_name in inserted}
+    group_ids = [ids_by_key[row['name'], row['class_name']] for row in rows]
+    db.session.execute(insert(GroupMember), [
+        {'user_id': user_id, 'group_id': group_id, 'joined_at': datetime.utcnow()}
+        for group_id, members in zip(group_ids, member_lists) for user_id in members])
+    # Every new member (creator included) may have just crossed a groups threshold
+    new_member_ids = {user_id for members in member_lists for user_id in members}
+    awarded = award_badges_many(db.session.scalars(select(User).where(User.id.in_(new_member_ids))).all(),
+                                'group_joined')
+    db.session.commit()
+
+    created = []
+    for group_id, row, members in zip(group_ids, rows, member_lists):
+        # A new group's summary is known without querying it back
+        summary = {
+            'id': group_id, 'name': row['name'], 'description': row['description'], 'class_name': row['class_name'],
+            'memberCount': len(members), 'reflectionCount': 0, 'goalCount': 0, 'gardenState': {'plants': []}}
+        _group_summaries[group_id] = (time.monotonic() + GROUP_SUMMARY_TTL, summary)
+        created.append(summary)
+        leaderboards.add_members(group_id, row['class_name'], members)
+        # Just what the greenhouse group list renders, so clients can insert it without refetching /api/groups
+        payload = {key: summary[key] for key in ('id', 'name', 'class_name', 'memberCount')}
+        for user_id in members:
+            queue_emit('group_created', payload, room=f'user_{user_id}')
+    for user_id, badges in awarded.items():
+        emit_new_badges(user_id, badges)
+    return created, skipped, unknown
+
+def parse_group_import(text, csv_format=False):
+    """Group specs from a JSON list (or {"groups": [...]}) or from CSV with
+    name, description, class_name and members columns; members are separated
+    by ';' or whitespace."""
+    if csv_format:
+        return [{**row, 'members': (row.get('members') or '').replace(';', ' ').split()}
+                for row in csv.DictReader(io.StringIO(text))]
+    data = json.loads(text)
+    specs = data.get('groups') if isinstance(data, dict) else data
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError('Expected a list of groups')
+    return specs
+
+# Garden versions
+GARDEN_USER_FIELDS = ('xp', 'level', 'streak')
+
+def bump_garden_version(session, user_id):
+    users = User.__table__
+    connection = session.connection()
+    connection.execute(users.update().where(users.c.id == user_id).values(garden_version=users.c.garden_version + 1))
+    return connection.execute(select(users.c.garden_version).where(users.c.id == user_id)).scalar()
+
+@db.event.listens_for(Session, 'before_flush')
+def _bump_touched_gardens(session, flush_context, instances):
+    plants, watered_plant_ids, user_ids = {}, {}, set()
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, UserPlant):
+            plants.setdefault(obj.user_id, []).append(obj)
+        elif isinstance(obj, PlantWatering):
+            watered_plant_ids.setdefault(obj.user_id, []).append(obj.plant_id)
+        elif isinstance(obj, UserBadge):
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, User) and obj.id is not None and any(
+                sa_inspect(obj).attrs[field].history.has_changes() for field in GARDEN_USER_FIELDS):
+            user_ids.add(obj.id)
+    for user_id in user_ids | plants.keys() | watered_plant_ids.keys():
+        version = bump_garden_version(session, user_id)
+        for plant in plants.get(user_id, ()):
+            plant.garden_version = version
+        if watered_plant_ids.get(user_id):
+            table = UserPlant.__table__
+            session.connection().execute(table.update().where(table.c.id.in_(watered_plant_ids[user_id])).values(
+                garden_version=version))
+
+@db.event.listens_for(Session, 'after_flush')
+def _collect_touched_groups(session, flush_context):
+    touched = session.info.setdefault('touched_groups', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (PlantType, Badge)):
+            session.info['catalog_dirty'] = True
+        elif isinstance(obj, Group):
+            touched.add(obj.id)
+        elif isinstance(obj, _GROUP_SCOPED) and obj.group_id:
+            touched.add(obj.group_id)
+
+@db.event.listens_for(Session, 'after_commit')
+def _invalidate_touched_groups(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop('wrote', None)
+    for group_id in session.info.pop('touched_groups', ()):
+        _group_summaries.pop(group_id, None)
+    if session.info.pop('catalog_dirty', False):
+        catalog.invalidate()
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_touched_groups(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop('wrote', None)
+    session.info.pop('touched_groups', None)
+    session.info.pop('catalog_dirty', None)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -337,6 +1433,7 @@ def register():
         new_user.set_password(password)
         db.session.add(new_user)
         db.session.commit()
+        user_directory.add(new_user)
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
     return render_template('register.html')
@@ -348,48 +1445,214 @@ def logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('login'))
 
+# Static assets
+# 'flask build-assets' copies everything under static/ into static/dist with a
+# content hash in the filename, next to gzip/brotli variants of text files and
+# WebP versions of the plant images. asset_url() maps a static filename to its
+# fingerprinted URL (or plain /static/ when it was never built), and /assets/
+# serves those files as immutable, picking the smallest variant the client accepts.
+# Builds are additive: each one also saves its manifest under manifests/, and
+# /assets/ keeps serving every build still listed there, so pages and workers
+# holding older hashes keep working until 'flask prune-assets' removes them.
+ASSET_DIR = os.path.join(app.static_folder, 'dist')
+ASSET_MANIFEST_DIR = os.path.join(ASSET_DIR, 'manifests')
+ASSET_URL_PATH = '/assets'
+ASSET_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_ASSETS = ('.js', '.css', '.svg', '.json', '.txt')
+WEBP_ASSETS = ('Images/plants/',)
+_asset_manifest, _assets_by_path, _asset_manifest_mtime = {}, {}, None
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def retained_asset_manifests():
+    """Manifests of the builds still on disk, newest first."""
+    try:
+        names = [name for name in os.listdir(ASSET_MANIFEST_DIR) if name.endswith('.json')]
+    except OSError:
+        return []
+    paths = sorted((os.path.join(ASSET_MANIFEST_DIR, name) for name in names), key=os.path.getmtime, reverse=True)
+    return [(path, _read_manifest(path)) for path in paths]
+
+def load_asset_manifest():
+    global _asset_manifest, _assets_by_path, _asset_manifest_mtime
+    manifest_path = os.path.join(ASSET_DIR, 'manifest.json')
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    manifest = _read_manifest(manifest_path)
+    assets_by_path = {}
+    for _, retained in reversed(retained_asset_manifests()):
+        assets_by_path.update((entry['path'], entry) for entry in retained.values())
+    assets_by_path.update((entry['path'], entry) for entry in manifest.values())
+    _asset_manifest, _assets_by_path, _asset_manifest_mtime = manifest, assets_by_path, mtime
+
+@app.template_global()
+def asset_url(filename):
+    entry = _asset_manifest.get(filename)
+    if entry is None:
+        return f'{app.static_url_path}/{filename}'
+    return f"{ASSET_URL_PATH}/{entry['path']}"
+
+def plant_image_url(image):
+    # PlantType.stages holds bare filenames under Images/plants or /static/ paths
+    if not image:
+        return image
+    filename = image[len(app.static_url_path) + 1:] if image.startswith(app.static_url_path + '/') else \
+        f'Images/plants/{image}' if '/' not in image else None
+    return asset_url(filename) if filename in _asset_manifest else image
+
+load_asset_manifest()
+
+class AssetAwareSessionInterface(SecureCookieSessionInterface):
+    # Flask-Login reads the session on every request, which adds 'Vary: Cookie';
+    # assets never depend on it, and the header would keep shared caches from storing them
+    def save_session(self, app, session, response):
+        super().save_session(app, session, response)
+        if request.endpoint == 'asset':
+            response.vary.discard('cookie')
+
+app.session_interface = AssetAwareSessionInterface()
+
+@app.route(f'{ASSET_URL_PATH}/<path:filename>')
+def asset(filename):
+    entry = _assets_by_path.get(filename)
+    if entry is None:
+        # Pages rendered by a worker that loaded a newer build: pick it up
+        try:
+            mtime = os.stat(os.path.join(ASSET_DIR, 'manifest.json')).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != _asset_manifest_mtime:
+            load_asset_manifest()
+            entry = _assets_by_path.get(filename)
+    if entry is None:
+        return jsonify({"error": "Asset not found"}), 404
+    served, encoding, vary = filename, None, []
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if entry.get('webp'):
+        vary.append('Accept')
+        if 'image/webp' in request.headers.get('Accept', ''):
+            served, mimetype = entry['webp']['path'], 'image/webp'
+    if entry.get('encodings'):
+        vary.append('Accept-Encoding')
+        for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if name in entry['encodings'] and request.accept_encodings[name]:
+                served, encoding = filename + suffix, name
+                break
+    response = send_from_directory(ASSET_DIR, served, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if vary:
+        response.headers['Vary'] = ', '.join(vary)
+    return response
+
+# Page shells
+# The page templates only interpolate a handful of user fields; everything
+# else is hydrated by JS. Each page is rendered once with marker strings in
+# place of those fields, split into static parts, and kept in memory; a request
+# just joins the parts with the current user's escaped values. Shell templates
+# must therefore only print user fields, never compute or branch on them.
+PAGE_USER_FIELDS = ('id', 'level', 'username', 'title', 'quote', 'pronouns')
+_MARKER = re.compile(r'\x00(\w+)\x00')
+
+class _ShellUser:
+    def __getattr__(self, name):
+        return Markup(f'\x00{name}\x00')
+
+class PageShells:
+    def __init__(self):
+        self._shells = {}
+        self._lock = threading.Lock()
+
+    def get(self, template, shell_key, context):
+        key = (template, shell_key)
+        shell = self._shells.get(key)
+        if shell is None or app.jinja_env.auto_reload:
+            html = render_template(template, user=_ShellUser(), current_user=_ShellUser(), **context)
+            parts = _MARKER.split(html)
+            shell = (parts, f'{zlib.crc32(html.encode()):08x}')
+            with self._lock:
+                self._shells[key] = shell
+        return shell
+
+page_shells = PageShells()
+
+def render_page(template, shell_key=None, **context):
+    """Serve a cached page shell filled with the current user's fields, with an ETag."""
+    parts, digest = page_shells.get(template, shell_key, context)
+    values = {field: getattr(current_user, field, None) for field in PAGE_USER_FIELDS}
+    etag = f'page-{digest}-{zlib.crc32(repr(sorted(values.items())).encode()):08x}'
+    headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Cookie'}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        body = ''.join(part if i % 2 == 0 else str(escape('' if values.get(part) is None else values[part]))
+                       for i, part in enumerate(parts))
+        response = Response(body, mimetype='text/html', headers=headers)
+    response.set_etag(etag)
+    return response
+
+def precompile_templates():
+    # Compiled templates are cached on disk so new workers skip Jinja's parse/compile step
+    cache_dir = os.path.join(app.instance_path, 'jinja-cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
+precompile_templates()
+
 # Main Page Routes
 @app.route('/')
 def homepage():
-    return render_template('homepage.html')
+    return render_page('homepage.html')
 
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    current_user.update_streak()
-    award_badges(current_user)
-    return render_template('dashboard.html', user=current_user)
+    # Only the first view of the day writes anything
+    if current_user.update_streak(commit=False):
+        badges = award_badges(current_user, 'activity')
+        db.session.commit()
+        emit_new_badges(current_user.id, badges)
+    return render_page('dashboard.html')
 
 @app.route('/journal')
 @login_required
 def journal():
+    # The group list is loaded by journal.js, so the shell only depends on today's prompt
     prompt = get_daily_prompt()
-    groups = Group.query.join(GroupMember).filter(GroupMember.user_id == current_user.id).all()
-    return render_template('journal.html', prompt=prompt, groups=groups)
+    return render_page('journal.html', shell_key=prompt, prompt=prompt)
 
 @app.route('/greenhouse')
 @login_required
 def greenhouse():
-    groups = Group.query.join(GroupMember).filter(GroupMember.user_id == current_user.id).all()
-    selected_group_id = request.args.get('group_id')
-    selected_group = Group.query.get(selected_group_id) if selected_group_id else groups[0] if groups else None
-    return render_template('greenhouse.html', groups=groups, selected_group=selected_group)
+    # greenhouse.js loads and selects groups itself
+    return render_page('greenhouse.html')
 
 @app.route('/pathways')
 @login_required
 def pathways():
-    return render_template('pathways.html')
+    return render_page('pathways.html')
 
 @app.route('/profile')
 @login_required
 def profile():
-    return render_template('profile.html', user=current_user)
+    return render_page('profile.html')
 
 # API Endpoints
 @app.route('/api/profile', methods=['GET'])
 @login_required
 def get_profile():
-    badges = [{'badge_name': ub.badge.name, 'icon': ub.badge.icon} for ub in current_user.badges]
+    badges = [catalog.badge(ub.badge_id) for ub in current_user.badges]
+    badges = [{'badge_name': b.name, 'icon': b.icon} for b in badges]
     return jsonify({'badges': badges})
 
 @app.route('/api/profile', methods=['PUT'])
@@ -425,28 +1688,38 @@ def submit_reflection():
         display_name = current_user.username
         is_anonymous = False
 
-    reflection = Reflection(
-        user_id=current_user.id,
-        content=content,
-        display_name=display_name,
-        is_anonymous=is_anonymous,
-        is_group=bool(group_id),
-        group_id=group_id,
-        keywords=extract_keywords(content)
-    )
-    db.session.add(reflection)
+    # Everything below is persisted as one unit of work: a single flush and commit
+    keywords = extract_keywords(content)
+    with db.session.no_autoflush:
+        reflection = Reflection(
+            user_id=current_user.id,
+            content=content,
+            display_name=display_name,
+            is_anonymous=is_anonymous,
+            is_group=bool(group_id),
+            group_id=group_id,
+            keywords=keywords,
+            tags=[ReflectionTag(tag=tag) for tag in tags],
+            search_keywords=[ReflectionKeyword(keyword=k[:100]) for k in keywords]
+        )
+        plant = create_plant_for_reflection(current_user, reflection)
+        db.session.add(reflection)
+        if plant:
+            db.session.add(plant)
+        current_user.xp += 10
+        current_user.level = calculate_level(current_user.xp)
+        current_user.update_streak(commit=False)
+    badges = award_badges(current_user, 'reflection_posted')
     db.session.commit()
+    leaderboards.record(current_user)
 
-    for tag in tags:
-        db.session.add(ReflectionTag(reflection_id=reflection.id, tag=tag))
-    create_plant_for_reflection(current_user, reflection)
-    current_user.xp += 10
-    current_user.level = calculate_level(current_user.xp)
-    db.session.commit()
+    if plant:
+        emit_new_plant(current_user, plant)
+    emit_new_badges(current_user.id, badges)
 
     # real-time updates
     if group_id:
-        socketio.emit('new_group_reflection', {
+        queue_emit('new_group_reflection', {
             'reflection': {
                 'id': reflection.id,
                 'content': reflection.content,
@@ -456,7 +1729,7 @@ def submit_reflection():
             }
         }, room=f'group_{group_id}')
     else:
-        socketio.emit('new_reflection', {
+        queue_emit('new_reflection', {
             'reflection': {
                 'id': reflection.id,
                 'content': reflection.content,
@@ -467,12 +1740,12 @@ def submit_reflection():
         }, room=f'user_{current_user.id}')
 
     # update user stats + garden
-    socketio.emit('user_state_update', {
+    queue_emit('user_state_update', {
         'streak': current_user.streak,
         'xp': current_user.xp,
         'level': current_user.level
     }, room=f'user_{current_user.id}')
-    socketio.emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
+    queue_emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
 
     return jsonify({"reflection": {
         'id': reflection.id,
@@ -482,10 +1755,36 @@ def submit_reflection():
         'created_at': reflection.created_at.isoformat()
     }})
 
+@app.route('/api/reflections/search')
+@login_required
+def search_reflections():
+    terms = extract_keywords(request.args.get('q', ''))
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    if not terms:
+        return jsonify([])
+    # Score = number of distinct query terms a reflection matches
+    hits = db.session.query(
+        ReflectionKeyword.reflection_id, func.count(ReflectionKeyword.id).label('score')
+    ).filter(ReflectionKeyword.keyword.in_(terms)).group_by(ReflectionKeyword.reflection_id).subquery()
+    group_ids = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == current_user.id)
+    results = db.session.query(Reflection, hits.c.score).join(hits, hits.c.reflection_id == Reflection.id).filter(
+        (Reflection.user_id == current_user.id) |
+        (Reflection.group_id.in_(group_ids))
+    ).order_by(hits.c.score.desc(), Reflection.created_at.desc()).limit(limit).all()
+    return jsonify([{
+        'id': refl.id,
+        'content': refl.content,
+        'display_name': refl.display_name or 'Anonymous',
+        'group_id': refl.group_id,
+        'created_at': refl.created_at.isoformat(),
+        'score': score
+    } for refl, score in results])
+
 @app.route('/api/recent-activity')
 @login_required
 def recent_activity():
-    group_ids = [gm.group_id for gm in current_user.groups]
+    # Membership stays a subquery so the whole feed is two SELECTs
+    group_ids = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == current_user.id)
     reflections = Reflection.query.filter(
         (Reflection.user_id == current_user.id) |
         (Reflection.group_id.in_(group_ids))
@@ -502,8 +1801,8 @@ def recent_activity():
             "created_at": refl.created_at.isoformat(),
             "content": refl.content,
             "display_name": refl.display_name if refl.display_name else "Anonymous",
-            "upvotes": sum(v.value for v in refl.votes) if refl.votes else 0,
-            "comments": len(refl.comments)
+            "upvotes": refl.vote_total,
+            "comments": refl.comment_count
         })
     for goal in goals:
         activities.append({
@@ -520,21 +1819,42 @@ def recent_activity():
 @app.route('/api/garden-state')
 @login_required
 def garden_state():
-    plants = [plant.to_dict() for plant in current_user.plants if plant.group_id is None]
+    # Strong ETag on the user's garden version; ?since=<version> returns only changed plants
+    since = request.args.get('since', type=int)
+    etag = f'garden-{current_user.id}-{current_user.garden_version}'
+    if since is not None:
+        etag += f'-since-{since}'
+    headers = {'Cache-Control': 'private, no-cache'}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    plants = UserPlant.query.filter(UserPlant.user_id == current_user.id, UserPlant.group_id == None)
+    if since is not None:
+        plants = plants.filter(UserPlant.garden_version > since)
+    plants = [plant.to_dict(stage) for plant, stage in grown_plants(plants.all())]
     badges = [
         {
-            'badge_id': ub.badge_id,
-            'badge_name': ub.badge.name,
-            'icon': ub.badge.icon
+            'badge_id': b.id,
+            'badge_name': b.name,
+            'icon': b.icon
         }
-        for ub in current_user.badges
+        for b in (catalog.badge(ub.badge_id) for ub in current_user.badges)
     ]
-    return jsonify({
+    state = {
         'plants': plants,
         'xp': current_user.xp,
         'streak': current_user.streak,
-        'badges': badges
-    })
+        'badges': badges,
+        'version': current_user.garden_version
+    }
+    if since is not None:
+        state['since'] = since
+    response = jsonify(state)
+    response.headers.update(headers)
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/plants/<int:plant_id>/water', methods=['POST'])
 @login_required
@@ -543,45 +1863,87 @@ def water_plant(plant_id):
     if plant.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
 
-    plant.current_stage += 1
-    max_stage = max(int(k) for k in plant.plant_type.stages.keys())
-    if plant.current_stage > max_stage:
-        plant.current_stage = max_stage
-    plant.last_watered = datetime.utcnow()
-    db.session.commit()
-
-    socketio.emit('garden_update', {'userId': plant.user_id}, room=f'user_{plant.user_id}')
+    plant_type = catalog.plant_type(plant.plant_type_id)
+    now = datetime.utcnow()
+    stage, last_watered = garden.replay(plant.current_stage, plant.last_watered,
+                                        pending_waterings([plant.id]).get(plant.id, ()), plant_type.max_stage)
+    # Waterings inside the cooldown or on a fully grown plant don't touch the DB
+    watered = garden.can_water(stage, last_watered, plant_type.max_stage, now)
+    if watered:
+        db.session.add(PlantWatering(plant_id=plant.id, user_id=plant.user_id, group_id=plant.group_id, watered_at=now))
+        stage += 1
+        badges = award_badges(current_user, 'plant_watered')
+        db.session.commit()
+        emit_new_badges(current_user.id, badges)
+        queue_emit('garden_update', {'userId': plant.user_id}, room=f'user_{plant.user_id}')
+        watering_compactor.ensure_started()
 
     return jsonify({
         "plant_id": plant.id,
-        "new_stage": plant.current_stage,
-        "image": plant.plant_type.stages.get(str(plant.current_stage))
+        "new_stage": stage,
+        "image": plant_type.image(stage),
+        "watered": watered
     })
 
+@app.route('/api/plants/water-all', methods=['POST'])
+@login_required
+def water_all_plants():
+    # Fold this user's pending waterings first, then grow every eligible plant with one UPDATE
+    compact_waterings(user_id=current_user.id)
+    now = datetime.utcnow()
+    plant_types = [pt_id for pt_id, in db.session.query(UserPlant.plant_type_id).filter_by(user_id=current_user.id).distinct()]
+    if not plant_types:
+        return jsonify({"watered": 0})
+    max_stage = db.case({pt_id: catalog.plant_type(pt_id).max_stage for pt_id in plant_types},
+                        value=UserPlant.plant_type_id, else_=0)
+    watered = db.session.query(UserPlant).filter(
+        UserPlant.user_id == current_user.id,
+        UserPlant.current_stage < max_stage,
+        (UserPlant.last_watered == None) | (UserPlant.last_watered <= now - garden.WATER_COOLDOWN)
+    ).update({UserPlant.current_stage: UserPlant.current_stage + 1, UserPlant.last_watered: now,
+              UserPlant.garden_version: select(User.garden_version + 1).where(User.id == current_user.id).scalar_subquery()},
+             synchronize_session=False)
+    if watered:
+        bump_garden_version(db.session, current_user.id)
+        # The bulk UPDATE bypasses the flush listeners, so mark shared gardens by hand
+        db.session.info.setdefault('touched_groups', set()).update(
+            group_id for group_id, in db.session.query(UserPlant.group_id).filter(
+                UserPlant.user_id == current_user.id, UserPlant.group_id != None).distinct())
+        badges = award_badges(current_user, 'plant_watered')
+        db.session.commit()
+        emit_new_badges(current_user.id, badges)
+        queue_emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
+    return jsonify({"watered": watered})
+
 @app.route('/api/groups', methods=['GET', 'POST'])
 @login_required
 def groups_api():
     if request.method == 'GET':
         groups = Group.query.join(GroupMember).filter(GroupMember.user_id == current_user.id).all()
-        return jsonify([g.to_dict() for g in groups])
+        return jsonify(serialize_groups(groups))
     else:
-        data = request.get_json()
-        group = Group(
-            name=data.get("name"),
-            description=data.get("description"),
-            class_name=data.get("class_name"),
-            created_by=current_user.id
-        )
-        db.session.add(group)
-        db.session.commit()
-        creator = GroupMember(user_id=current_user.id, group_id=group.id)
-        db.session.add(creator)
-        for member_id in data.get("members", []):
-            if member_id != current_user.id:
-                db.session.add(GroupMember(user_id=member_id, group_id=group.id))
-        db.session.commit()
-        socketio.emit('group_created', group.to_dict())
-        return jsonify(group.to_dict()), 201
+        data = request.get_json() or {}
+        created, skipped, _ = create_groups(current_user, [data], skip_existing=False)
+        if skipped:
+            return jsonify({"error": skipped[0]['reason']}), 400
+        return jsonify(created[0]), 201
+
+@app.route('/api/groups/bulk', methods=['POST'])
+@login_required
+def bulk_create_groups():
+    # JSON list / {"groups": [...]} body, or a CSV body or 'file' upload
+    upload = request.files.get('file')
+    try:
+        if upload:
+            specs = parse_group_import(upload.read().decode('utf-8-sig'), upload.filename.lower().endswith('.csv'))
+        else:
+            specs = parse_group_import(request.get_data(as_text=True), request.mimetype == 'text/csv')
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Invalid import: {e}"}), 400
+    if len(specs) > 1000:
+        return jsonify({"error": "At most 1000 groups per import"}), 400
+    created, skipped, unknown = create_groups(current_user, specs)
+    return jsonify({'created': created, 'skipped': skipped, 'unknown_members': unknown}), 201 if created else 200
 
 @app.route('/api/groups/<int:group_id>', methods=['GET'])
 @login_required
@@ -593,30 +1955,72 @@ def get_group(group_id):
     # to_dict includes name, description, counts, and shared gardenState
     return jsonify(group.to_dict())
 
+def _activity_branch(stmt, created_at, row_id, kind, cursor, limit):
+    if cursor:
+        stmt = stmt.where(tuple_(created_at, row_id, literal(kind)) < tuple_(*cursor))
+    return stmt.order_by(created_at.desc(), row_id.desc()).limit(limit).subquery()
+
+def _activity_dict(row):
+    if row.type == 'reflection':
+        return {
+            "type": "reflection",
+            "userName": row.user_name or "Anonymous",
+            "createdAt": row.created_at.isoformat(),
+            "content": row.content,
+        }
+    return {
+        "type": "goal",
+        "userName": row.user_name,
+        "createdAt": row.created_at.isoformat(),
+        "goalName": row.goal_name,
+        "progress": row.progress,
+        "status": row.status
+    }
+
 @app.route('/api/groups/<int:group_id>/activity', methods=['GET'])
 @login_required
 def group_activity(group_id):
-    reflections = Reflection.query.filter_by(group_id=group_id).order_by(Reflection.created_at.desc()).all()
-    goals = Goal.query.filter_by(group_id=group_id).order_by(Goal.created_at.desc()).all()
-    activities = []
-    for refl in reflections:
-        activities.append({
-            "type": "reflection",
-            "userName": refl.display_name or "Anonymous",
-            "createdAt": refl.created_at.isoformat(),
-            "content": refl.content,
-        })
-    for goal in goals:
-        activities.append({
-            "type": "goal",
-            "userName": User.query.get(goal.created_by).username,
-            "createdAt": goal.created_at.isoformat(),
-            "goalName": goal.title,
-            "progress": goal.progress,
-            "status": goal.status
-        })
-    activities = sorted(activities, key=lambda x: x["createdAt"], reverse=True)
-    return jsonify(activities)
+    # Keyset pagination over (created_at, id, type); ?cursor= comes from the X-Next-Cursor header
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            created_at, row_id, kind = cursor.split(',')
+            cursor = (datetime.fromisoformat(created_at), int(row_id), kind)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    # Each branch is bounded by the cursor and limit before the merge, and goal
+    # authors come from a join rather than a lookup per goal
+    reflections = _activity_branch(
+        select(literal('reflection').label('type'), Reflection.id, Reflection.created_at,
+               Reflection.display_name.label('user_name'), Reflection.content,
+               null().label('goal_name'), null().label('progress'), null().label('status'))
+        .where(Reflection.group_id == group_id),
+        Reflection.created_at, Reflection.id, 'reflection', cursor, limit)
+    goals = _activity_branch(
+        select(literal('goal').label('type'), Goal.id, Goal.created_at,
+               User.username.label('user_name'), null().label('content'),
+               Goal.title.label('goal_name'), Goal.progress, Goal.status)
+        .join(User, User.id == Goal.created_by)
+        .where(Goal.group_id == group_id),
+        Goal.created_at, Goal.id, 'goal', cursor, limit)
+    merged = union_all(select(reflections), select(goals)).subquery()
+    rows = db.session.execute(
+        select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc(), merged.c.type.desc()).limit(limit)
+    ).all()
+
+    headers = {}
+    if len(rows) == limit:
+        last = rows[-1]
+        headers['X-Next-Cursor'] = f'{last.created_at.isoformat()},{last.id},{last.type}'
+
+    def generate():
+        yield '['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + json.dumps(_activity_dict(row))
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
 
 @app.route('/api/goals', methods=['GET'])
 @login_required
@@ -644,16 +2048,16 @@ def create_goal():
     db.session.add(new_goal)
     db.session.commit()
 
-    socketio.emit('goal_created', new_goal.to_dict(),
+    queue_emit('goal_created', new_goal.to_dict(),
                   room=f'group_{new_goal.group_id}' if new_goal.group_id else f'user_{current_user.id}')
 
     if not new_goal.group_id:
-        socketio.emit('user_state_update', {
+        queue_emit('user_state_update', {
             'streak': current_user.streak,
             'xp': current_user.xp,
             'level': current_user.level
         }, room=f'user_{current_user.id}')
-        socketio.emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
+        queue_emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
 
     return jsonify({"goal": new_goal.to_dict()}), 201
 
@@ -670,7 +2074,7 @@ def update_goal(goal_id):
     if data.get("due_date"):
         goal.due_date = datetime.strptime(data["due_date"], "%Y-%m-%d")
     db.session.commit()
-    socketio.emit('goal_updated', goal.to_dict(), room=f'user_{current_user.id}')
+    queue_emit('goal_updated', goal.to_dict(), room=f'user_{current_user.id}')
     return jsonify(goal.to_dict())
 
 @app.route('/api/goals/<int:goal_id>', methods=['DELETE'])
@@ -681,7 +2085,7 @@ def delete_goal(goal_id):
         return jsonify({"error": "Unauthorized"}), 403
     db.session.delete(goal)
     db.session.commit()
-    socketio.emit('goal_deleted', {'goal_id': goal_id}, room=f'user_{current_user.id}')
+    queue_emit('goal_deleted', {'goal_id': goal_id}, room=f'user_{current_user.id}')
     return jsonify({"message": "Goal deleted successfully."})
 
 @app.route('/api/goals/<int:goal_id>/complete', methods=['POST'])
@@ -692,18 +2096,54 @@ def complete_goal(goal_id):
         return jsonify({"error": "Unauthorized"}), 403
     goal.status = 'completed'
     goal.progress = 100
+    badges = award_badges(current_user, 'goal_completed')
     db.session.commit()
-    socketio.emit('goal_updated', goal.to_dict(), room=f'user_{current_user.id}')
-    socketio.emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
+    emit_new_badges(current_user.id, badges)
+    queue_emit('goal_updated', goal.to_dict(), room=f'user_{current_user.id}')
+    queue_emit('garden_update', {'userId': current_user.id}, room=f'user_{current_user.id}')
     return jsonify(goal.to_dict())
 
 @app.route('/api/users')
 @login_required
 def get_users():
-    # returns all other users so you can invite them to groups
-    users = User.query.filter(User.id != current_user.id).all()
-    users_data = [{"id": u.id, "username": u.username} for u in users]
-    return jsonify(users_data)
+    # Typeahead for group invites: other users whose username starts with ?q=,
+    # one page at a time; ?cursor= comes from the X-Next-Cursor header
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    if cursor:
+        # Base64 of the last username: headers must stay latin-1 and usernames need not be
+        try:
+            cursor = base64.b64decode(cursor, altchars=b'-_', validate=True).decode('utf-8')
+        except (ValueError, UnicodeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+    users, more = user_directory.search(request.args.get('q', '').strip(), after=cursor, limit=limit,
+                                        exclude=current_user.id)
+    headers = {'X-Next-Cursor': base64.urlsafe_b64encode(users[-1][1].encode('utf-8')).decode('ascii')} if more else {}
+    return jsonify([{"id": user_id, "username": username} for user_id, username in users]), 200, headers
+
+@app.route('/api/leaderboard')
+@login_required
+def global_leaderboard():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    return jsonify(leaderboards.to_dict(leaderboards.board('global'), current_user.id, limit))
+
+@app.route('/api/groups/<int:group_id>/leaderboard')
+@login_required
+def group_leaderboard(group_id):
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    board = leaderboards.board('group', group_id)
+    if board is None or current_user.id not in board:
+        return jsonify({"error": "Group not found"}), 404
+    return jsonify(leaderboards.to_dict(board, current_user.id, limit))
+
+@app.route('/api/leaderboard/class/<path:class_name>')
+@login_required
+def class_leaderboard(class_name):
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    board = leaderboards.board('class', class_name)
+    if board is None:
+        return jsonify({"error": "Class not found"}), 404
+    return jsonify(leaderboards.to_dict(board, current_user.id, limit))
 
 @app.route('/api/milestones')
 @login_required
@@ -736,39 +2176,403 @@ def get_pathways():
     user_goals = Goal.query.filter_by(created_by=current_user.id).all()
     return jsonify([{"id": g.id, "title": g.title, "description": g.description, "status": g.status, "type": g.type, "due_date": g.due_date.isoformat() if g.due_date else None} for g in user_goals])
 
+@app.route('/metrics')
+def metrics():
+    token = app.config['METRICS_TOKEN']
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    is_admin = current_user.is_authenticated and current_user.username in app.config['ADMIN_USERNAMES']
+    if not (is_admin or (token and hmac.compare_digest(bearer, token))):
+        return jsonify({"error": "Unauthorized"}), 403
+    return Response(profiler.prometheus(), mimetype='text/plain; version=0.0.4')
+
 # Socket.IO Event Handlers
-@socketio.on('connect')
+@socket_event('connect')
 def handle_connect(auth):
     if current_user.is_authenticated:
         join_room(f'user_{current_user.id}')
 
-@socketio.on('disconnect')
+@socket_event('disconnect')
 def handle_disconnect():
     pass
 
-@socketio.on('join_group')
+@socket_event('join_group')
 def handle_join_group(data):
     join_room(f'group_{data["group_id"]}')
 
-@socketio.on('new_comment')
+def can_view_reflection(user_id, reflection_id):
+    # Same rule as the feeds: the user's own reflections and their groups' reflections
+    group_ids = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+    return db.session.execute(select(Reflection.id).where(
+        Reflection.id == reflection_id,
+        (Reflection.user_id == user_id) | Reflection.group_id.in_(group_ids)
+    )).first() is not None
+
+@socket_event('join_reflection')
+def handle_join_reflection(data):
+    try:
+        reflection_id = int(data.get('reflection_id'))
+    except (TypeError, ValueError, AttributeError):
+        return {'error': 'Invalid reflection'}
+    if not current_user.is_authenticated or not can_view_reflection(current_user.id, reflection_id):
+        return {'error': 'Unauthorized'}
+    join_room(f'reflection_{reflection_id}')
+
+@socket_event('leave_reflection')
+def handle_leave_reflection(data):
+    leave_room(f'reflection_{data["reflection_id"]}')
+
+class CommentWriter:
+    """Inserts comments queued by the socket handler in micro-batches.
+
+    A failed batch (e.g. "database is locked") is retried with exponential
+    backoff; after `max_attempts` it is written row by row so only rows that
+    fail on their own with a non-operational error are dropped.
+    """
+    def __init__(self, batch_size=200, interval=0.05, max_backoff=5.0, max_attempts=6):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._queue = queue.SimpleQueue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, author, reflection_id, content):
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    socketio.start_background_task(self._run)
+                    self._started = True
+        row = {'user_id': user_id, 'reflection_id': reflection_id, 'content': content,
+               'created_at': datetime.utcnow(), 'author': author}
+        self._queue.put(row)
+        return row
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        batch, attempts = [], 0
+        while True:
+            batch = batch or self._drain()
+            if not batch:
+                socketio.sleep(self.interval)
+                continue
+            with app.app_context():
+                try:
+                    if attempts < self.max_attempts:
+                        self.write(batch)
+                    else:
+                        self._write_rows(batch)
+                    batch, attempts = [], 0
+                except Exception as e:
+                    db.session.rollback()
+                    attempts += 1
+                    delay = min(self.interval * 2 ** attempts, self.max_backoff)
+                    current_app.logger.warning(f"Writing {len(batch)} comments failed ({e}); retry {attempts} in {delay:.2f}s")
+            if batch:
+                socketio.sleep(delay)
+
+    def _write_rows(self, batch):
+        # Consumes `batch` in place; operational errors (locks, lost connections)
+        # propagate so the remaining rows go back to the backoff loop
+        while batch:
+            try:
+                self.write(batch[:1])
+            except OperationalError:
+                raise
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Dropped comment on reflection {batch[0]['reflection_id']}: {e}")
+            batch.pop(0)
+
+    def write(self, batch):
+        ids = {row['reflection_id'] for row in batch}
+        existing = {refl_id for (refl_id,) in db.session.query(Reflection.id).filter(Reflection.id.in_(ids))}
+        batch = [row for row in batch if row['reflection_id'] in existing]
+        if not batch:
+            return
+        db.session.execute(insert(Comment), [
+            {key: row[key] for key in ('user_id', 'reflection_id', 'content', 'created_at')} for row in batch
+        ])
+        # Bulk inserts skip the mapper listeners, so the feed counters are bumped here
+        table = Reflection.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('_id')).values(comment_count=table.c.comment_count + bindparam('_n')),
+            [{'_id': refl_id, '_n': n} for refl_id, n in Counter(row['reflection_id'] for row in batch).items()]
+        )
+        db.session.commit()
+        for row in batch:
+            socketio.emit('new_comment', {
+                'reflectionId': row['reflection_id'],
+                'comment': {
+                    'author': row['author'],
+                    'content': row['content'],
+                    'createdAt': row['created_at'].isoformat()
+                }
+            }, room=f'reflection_{row["reflection_id"]}')
+
+comment_writer = CommentWriter()
+
+@socket_event('new_comment')
 def handle_new_comment(data):
-    comment = Comment(
-        user_id=current_user.id,
-        reflection_id=data['reflection_id'],
-        content=data['content']
-    )
-    db.session.add(comment)
+    # Acknowledged straight away; the write and broadcast happen in CommentWriter
+    if not current_user.is_authenticated:
+        return {'error': 'Unauthorized'}
+    content = (data.get('content') or '').strip()
+    try:
+        reflection_id = int(data.get('reflection_id'))
+    except (TypeError, ValueError):
+        return {'error': 'Invalid reflection'}
+    if not content:
+        return {'error': 'Empty comment'}
+    if not can_view_reflection(current_user.id, reflection_id):
+        return {'error': 'Unauthorized'}
+    row = comment_writer.submit(current_user.id, current_user.username, reflection_id, content)
+    return {'status': 'queued', 'comment': {
+        'author': row['author'],
+        'content': row['content'],
+        'createdAt': row['created_at'].isoformat()
+    }}
+
+# CLI Commands
+def hot_queries(user_id=1, group_id=1):
+    """Representative statements for the hot endpoints, checked by check-query-plans."""
+    group_ids = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+    return {
+        'recent_activity reflections': select(Reflection.id).where(
+            (Reflection.user_id == user_id) | Reflection.group_id.in_(group_ids)
+        ).order_by(Reflection.created_at.desc()).limit(10),
+        'recent_activity goals': select(Goal.id).where(
+            (Goal.created_by == user_id) | Goal.group_id.in_(group_ids)
+        ).order_by(Goal.created_at.desc()).limit(10),
+        'group_activity reflections': select(Reflection.id).where(Reflection.group_id == group_id)
+            .order_by(Reflection.created_at.desc(), Reflection.id.desc()).limit(50),
+        'group_activity goals': select(Goal.id).where(Goal.group_id == group_id)
+            .order_by(Goal.created_at.desc(), Goal.id.desc()).limit(50),
+        'personal goals': select(Goal.id).where(Goal.created_by == user_id, Goal.type == 'personal'),
+        'group goals': select(Goal.id).join(GroupMember, Goal.group_id == GroupMember.group_id)
+            .where(GroupMember.user_id == user_id, Goal.type == 'group'),
+        'user groups': select(Group.id).join(GroupMember).where(GroupMember.user_id == user_id),
+        'group member count': select(func.count(GroupMember.id)).where(GroupMember.group_id == group_id),
+        'group reflection count': select(func.count(Reflection.id)).where(Reflection.group_id == group_id),
+        'group goal count': select(func.count(Goal.id)).where(Goal.group_id == group_id),
+        'group garden': select(UserPlant.id).where(UserPlant.group_id == group_id),
+        'personal garden': select(UserPlant.id).where(UserPlant.user_id == user_id, UserPlant.group_id == None),
+        'earned badges': select(UserBadge.badge_id).where(UserBadge.user_id == user_id),
+        'badge check': select(UserBadge.id).where(UserBadge.user_id == user_id, UserBadge.badge_id == 1),
+        'reflection tags': select(ReflectionTag.tag).where(ReflectionTag.reflection_id == 1),
+        'search keywords': select(ReflectionKeyword.reflection_id).where(ReflectionKeyword.keyword.in_(['garden'])),
+        'pending waterings': select(PlantWatering.watered_at).where(PlantWatering.plant_id.in_([1, 2])),
+    }
+
+def query_plan_problems():
+    """(name, plan detail) for every hot query whose SQLite plan full-scans a table."""
+    tables = set(db.metadata.tables)
+    problems = []
+    with db.engine.connect() as connection:
+        for name, stmt in hot_queries().items():
+            sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql):
+                words = row[-1].split()
+                if words[0] == 'SCAN' and words[1] in tables:
+                    problems.append((name, row[-1]))
+    return problems
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Fail if any hot endpoint query falls back to a full table scan (SQLite only)."""
+    if db.engine.dialect.name != 'sqlite':
+        print(f"Skipping: EXPLAIN QUERY PLAN check only supports sqlite, not {db.engine.dialect.name}")
+        return
+    problems = query_plan_problems()
+    for name, detail in problems:
+        print(f"FULL SCAN in {name}: {detail}")
+    if problems:
+        sys.exit(1)
+    print(f"All {len(hot_queries())} hot queries use indexes")
+
+@app.cli.command('import-groups')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--creator', required=True, help='Username that will own the groups')
+def import_groups(path, creator):
+    """Create groups and memberships from a .csv or .json file."""
+    owner = User.query.filter_by(username=creator).first()
+    if owner is None:
+        raise click.ClickException(f"No user named {creator}")
+    with open(path, encoding='utf-8-sig') as f:
+        specs = parse_group_import(f.read(), path.lower().endswith('.csv'))
+    created, skipped, unknown = create_groups(owner, specs)
+    for entry in skipped:
+        print(f"Skipped {entry['name']!r} ({entry['class_name']}): {entry['reason']}")
+    for entry in unknown:
+        print(f"Unknown member {entry['member']!r} in {entry['group']!r}")
+    print(f"Created {len(created)} groups with {sum(group['memberCount'] for group in created)} memberships")
+
+def _fingerprint(path, data, suffix=None):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{suffix or ext}'
+
+def _write_asset(path, data):
+    # Written under a temporary name and renamed, so a running worker never
+    # serves a half-written file or reads a partial manifest
+    target = os.path.join(ASSET_DIR, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(target + '.tmp', target)
+
+def _asset_files(entry):
+    paths = [entry['path']]
+    paths += [entry['path'] + suffix for suffix in ('.gz', '.br')]
+    if entry.get('webp'):
+        paths.append(entry['webp']['path'])
+    return paths
+
+def page_asset_report(manifest):
+    """Per template: (assets, bytes as plain /static/ files, bytes served from /assets/)."""
+    report = {}
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        source = app.jinja_env.loader.get_source(app.jinja_env, name)[0]
+        raw = served = count = 0
+        for filename in dict.fromkeys(re.findall(r"asset_url\('([^']+)'\)", source)):
+            entry = manifest.get(filename)
+            if entry is None:
+                continue
+            variants = [entry['size']] + list(entry.get('encodings', {}).values())
+            if entry.get('webp'):
+                variants.append(entry['webp']['size'])
+            raw, served, count = raw + entry['size'], served + min(variants), count + 1
+        if count:
+            report[name] = (count, raw, served)
+    return report
+
+@app.cli.command('build-assets')
+def build_assets():
+    """Fingerprint and pre-compress static files into static/dist and report the savings.
+
+    Files from earlier builds are left in place; see prune-assets."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli not installed; writing gzip variants only")
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+        print("Pillow not installed; skipping WebP images")
+    manifest = {}
+    for root, dirs, files in os.walk(app.static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != ASSET_DIR)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            filename = os.path.relpath(source, app.static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            path = _fingerprint(filename, data)
+            _write_asset(path, data)
+            entry = manifest[filename] = {'path': path, 'size': len(data)}
+            if filename.endswith(COMPRESSIBLE_ASSETS):
+                variants = {'gzip': ('.gz', gzip.compress(data, 9, mtime=0))}
+                if brotli:
+                    variants['br'] = ('.br', brotli.compress(data, quality=11))
+                for encoding, (suffix, compressed) in variants.items():
+                    if len(compressed) < len(data):
+                        _write_asset(path + suffix, compressed)
+                        entry.setdefault('encodings', {})[encoding] = len(compressed)
+            elif Image and filename.startswith(WEBP_ASSETS) and filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+                buffer = io.BytesIO()
+                Image.open(io.BytesIO(data)).save(buffer, 'WEBP', quality=80, method=6)
+                webp = buffer.getvalue()
+                if len(webp) < len(data):
+                    webp_path = _fingerprint(filename, webp, '.webp')
+                    _write_asset(webp_path, webp)
+                    entry['webp'] = {'path': webp_path, 'size': len(webp)}
+    # Manifests go last, once every file they point at exists
+    manifest_json = json.dumps(manifest, indent=2, sort_keys=True).encode()
+    build_id = hashlib.sha256(manifest_json).hexdigest()[:10]
+    _write_asset(f'manifests/{build_id}.json', manifest_json)
+    _write_asset('manifest.json', manifest_json)
+    load_asset_manifest()
+
+    total = sum(entry['size'] for entry in manifest.values())
+    print(f"Built {len(manifest)} assets ({total / 1024:.1f} KB) into {os.path.relpath(ASSET_DIR)}")
+    for filename, entry in sorted(manifest.items()):
+        if entry.get('webp'):
+            print(f"  {filename}: {entry['size'] / 1024:.1f} KB -> {entry['webp']['size'] / 1024:.1f} KB WebP")
+    print(f"{'page':20} {'assets':>6} {'static KB':>10} {'served KB':>10} {'saved':>6}")
+    for page, (count, raw, served) in sorted(page_asset_report(manifest).items()):
+        print(f"{page:20} {count:6} {raw / 1024:10.1f} {served / 1024:10.1f} {(raw - served) / raw:6.0%}")
+    print("Repeat views revalidate nothing: /assets/ responses are cached as immutable for a year")
+    print(f"Build {build_id}; earlier builds stay servable until 'flask prune-assets'")
+
+@app.cli.command('prune-assets')
+@click.option('--keep', default=3, show_default=True, help='Number of most recent builds to keep')
+def prune_assets(keep):
+    """Delete fingerprinted files that no recent build references."""
+    current = os.path.join(ASSET_DIR, 'manifest.json')
+    retained = retained_asset_manifests()
+    kept, dropped = retained[:max(keep, 1)], retained[max(keep, 1):]
+    referenced = {path for _, manifest in kept + [(current, _read_manifest(current))]
+                  for entry in manifest.values() for path in _asset_files(entry)}
+    removed = 0
+    for root, dirs, files in os.walk(ASSET_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != ASSET_MANIFEST_DIR]
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), ASSET_DIR).replace(os.sep, '/')
+            if path != 'manifest.json' and path not in referenced:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    for path, _ in dropped:
+        os.remove(path)
+    print(f"Removed {removed} files from {len(dropped)} old builds; kept {len(kept)} builds")
+
+@app.cli.command('compact-waterings')
+def compact_waterings_command():
+    """Fold every pending watering event into user_plants."""
+    total = 0
+    while True:
+        compacted = compact_waterings()
+        if not compacted:
+            break
+        total += compacted
+    print(f"Compacted {total} waterings")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Re-extract keywords for every reflection and rebuild reflection_keywords."""
+    table = Reflection.__table__
+    # updated_at is pinned so the backfill doesn't look like an edit
+    set_keywords = table.update().where(table.c.id == bindparam('_id')).values(
+        keywords=bindparam('_keywords'), updated_at=table.c.updated_at)
+    db.session.query(ReflectionKeyword).delete()
+    last_id, total = 0, 0
+    while True:
+        batch = db.session.query(Reflection.id, Reflection.content).filter(
+            Reflection.id > last_id).order_by(Reflection.id).limit(500).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        keywords = extract_keywords_batch(content for _, content in batch)
+        db.session.execute(set_keywords, [{'_id': refl_id, '_keywords': words}
+                                          for (refl_id, _), words in zip(batch, keywords)])
+        rows = [{'reflection_id': refl_id, 'keyword': word[:100]}
+                for (refl_id, _), words in zip(batch, keywords) for word in words]
+        if rows:
+            db.session.execute(insert(ReflectionKeyword), rows)
+        total += len(rows)
     db.session.commit()
-    emit('new_comment', {
-        'reflectionId': comment.reflection_id,
-        'comment': {
-            'author': current_user.username,
-            'content': comment.content,
-            'createdAt': comment.created_at.isoformat()
-        }
-    }, room=f'reflection_{comment.reflection_id}')
+    print(f"Indexed {total} keywords")
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        catalog.ensure_loaded()
     socketio.run(app, debug=True)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""Quick throughput benchmarks against a throwaway SQLite database.
+
+Set SQLITE_JOURNAL_MODE=DELETE to compare against the rollback journal.
+
+Usage: python bench.py [posts] [dashboard] [mixed] [keywords] [fanout] [leaderboard] [api] [--n 200]
+
+The api benchmark seeds a synthetic dataset (--users, --groups, --reflections,
+--goals, --plants), reports p50/p95/p99 latency and queries per request for the
+core endpoints and Socket.IO events, and can save the results (--json out.json)
+and diff them against an earlier run (--compare baseline.json).
+"""
+import os, time, json, random, tempfile, argparse, threading, statistics, subprocess
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix='garden-bench-')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_tmpdir, 'bench.db'))
+
+from sqlalchemy import event, insert
+from app import app, db, socketio, User, PlantType, Group, GroupMember, Reflection, Goal, UserPlant
+
+PLANT_TYPES = [
+    ('Sunflower', {'0': 'sprout.jpg', '1': 'sunflower.jpg'}),
+    ('Knowledge Shrub', {'0': 'sprout.jpg', '1': 'branch.jpg', '2': 'shrub.jpg'}),
+    ('Wisdom Tree', {'0': 'sprout.jpg', '1': 'branch.jpg', '2': 'leaves.jpg', '3': 'tree.jpg'}),
+]
+
+def seed(users=1):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for name, stages in PLANT_TYPES:
+            db.session.add(PlantType(name=name, stages=stages))
+        for i in range(users):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            user.set_password('password')
+            db.session.add(user)
+        db.session.commit()
+
+def login(client, username='user0'):
+    client.post('/login', data={'username': username, 'password': 'password'})
+    return client
+
+def bench_posts(n):
+    seed()
+    client = login(app.test_client())
+    body = {'content': 'Today I learned about indexes and transactions ' * 5, 'tags': ['db', 'perf']}
+    start = time.perf_counter()
+    for _ in range(n):
+        assert client.post('/api/reflections', json=body).status_code == 200
+    elapsed = time.perf_counter() - start
+    print(f'posts: {n} in {elapsed:.2f}s -> {n / elapsed:.1f} posts/sec')
+
+def bench_dashboard(n, readers=4, writers=2):
+    """Dashboard requests/sec while other users keep posting reflections."""
+    seed(readers + writers)
+    body = {'content': 'Concurrent writer reflection ' * 10}
+    stop = threading.Event()
+    counts = [0] * readers
+
+    def write(i):
+        client = login(app.test_client(), f'user{readers + i}')
+        while not stop.is_set():
+            client.post('/api/reflections', json=body)
+
+    def read(i):
+        client = login(app.test_client(), f'user{i}')
+        for _ in range(n):
+            assert client.get('/dashboard').status_code == 200
+            counts[i] += 1
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    readers_ = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    for t in readers_:
+        t.start()
+    for t in readers_:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+    total = sum(counts)
+    print(f'dashboard: {total} GETs ({readers} readers, {writers} writers) in {elapsed:.2f}s -> {total / elapsed:.1f} req/sec')
+
+def bench_mixed(n, readers=6, writers=3):
+    """Mixed API load: readers poll garden/feed/groups while writers post and water."""
+    seed(readers + writers)
+    reads, writes, errors = [0] * readers, [0] * writers, []
+    paths = ('/api/garden-state', '/api/recent-activity', '/api/groups', '/api/goals')
+
+    def read(i):
+        client = login(app.test_client(), f'user{i}')
+        for j in range(n):
+            status = client.get(paths[j % len(paths)]).status_code
+            reads[i] += status == 200
+            if status != 200:
+                errors.append(status)
+
+    def write(i):
+        client = login(app.test_client(), f'user{readers + i}')
+        for j in range(n // 2):
+            response = client.post('/api/reflections', json={'content': f'Mixed load reflection {j} ' * 10})
+            if response.status_code == 200:
+                client.post('/api/plants/water-all')
+                writes[i] += 1
+            else:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f'mixed [{os.environ.get("SQLITE_JOURNAL_MODE", "WAL")}]: {sum(reads) / elapsed:.1f} reads/sec, '
+          f'{sum(writes) / elapsed:.1f} writes/sec ({readers} readers, {writers} writers), {len(errors)} errors')
+
+DATASET = {'users': 200, 'groups': 20, 'members': 15, 'reflections': 2000, 'goals': 500, 'plants': 600}
+
+def seed_dataset(users, groups, members, reflections, goals, plants):
+    """Bulk-load a synthetic dataset; user0 belongs to every group."""
+    seed(users)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.execute(insert(Group), [
+            {'name': f'Group {i}', 'description': 'Synthetic group', 'class_name': f'Class {i % 4}',
+             'created_by': 1, 'created_at': now} for i in range(groups)])
+        memberships = {(1, group_id) for group_id in range(1, groups + 1)}
+        for group_id in range(1, groups + 1):
+            memberships.update((user_id, group_id) for user_id in rng.sample(range(1, users + 1), min(members, users)))
+        db.session.execute(insert(GroupMember), [
+            {'user_id': user_id, 'group_id': group_id, 'joined_at': now} for user_id, group_id in sorted(memberships)])
+        db.session.execute(insert(Reflection), [
+            {'user_id': rng.randrange(1, users + 1), 'content': f'Synthetic reflection {i} about learning ' * 4,
+             'display_name': 'bench', 'is_group': bool(groups) and i % 3 == 0,
+             'group_id': rng.randrange(1, groups + 1) if groups and i % 3 == 0 else None,
+             'created_at': now - timedelta(minutes=i)} for i in range(reflections)])
+        db.session.execute(insert(Goal), [
+            {'title': f'Goal {i}', 'description': 'Synthetic goal', 'type': 'group' if groups and i % 2 else 'personal',
+             'created_by': rng.randrange(1, users + 1), 'group_id': rng.randrange(1, groups + 1) if groups and i % 2 else None,
+             'created_at': now} for i in range(goals)])
+        db.session.execute(insert(UserPlant), [
+            {'user_id': 1 if i % 10 == 0 else rng.randrange(1, users + 1), 'plant_type_id': rng.randrange(1, len(PLANT_TYPES) + 1),
+             'current_stage': 0, 'planted_at': now, 'last_watered': now - timedelta(hours=1), 'group_id': None}
+            for i in range(plants)])
+        db.session.commit()
+
+class QueryCounter:
+    """Counts SQL statements issued by the calling thread (background writers are excluded)."""
+    def __init__(self):
+        self.count = 0
+        self.thread = threading.get_ident()
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+def _percentiles(samples):
+    if len(samples) < 2:
+        return {'p50': samples[0], 'p95': samples[0], 'p99': samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def bench_api(n, dataset=None, output=None, compare=None):
+    """Latency percentiles and queries/request for the core API on a seeded dataset."""
+    dataset = {**DATASET, **(dataset or {})}
+    seed_dataset(**dataset)
+    client = login(app.test_client())
+    sio = socketio.test_client(app, flask_test_client=client)
+    counter = QueryCounter()
+    scenarios = [
+        ('POST /api/reflections', lambda i: client.post('/api/reflections', json={'content': f'Benchmark reflection {i} on indexes'})),
+        ('GET /api/recent-activity', lambda i: client.get('/api/recent-activity')),
+        ('GET /api/groups', lambda i: client.get('/api/groups')),
+        ('GET /api/garden-state', lambda i: client.get('/api/garden-state')),
+        ('GET /api/goals', lambda i: client.get('/api/goals')),
+        ('POST /api/goals', lambda i: client.post('/api/goals', json={'title': f'Benchmark goal {i}'})),
+        ('GET /dashboard', lambda i: client.get('/dashboard')),
+        ('socket join_group', lambda i: sio.emit('join_group', {'group_id': i % max(dataset['groups'], 1) + 1})),
+        ('socket new_comment', lambda i: sio.emit('new_comment', {'reflection_id': i + 1, 'content': 'Nice one'}, callback=True)),
+    ]
+    results = {}
+    for name, call in scenarios:
+        call(0)  # warm caches and lazy imports
+        latencies, queries = [], []
+        for i in range(n):
+            counter.count = 0
+            start = time.perf_counter()
+            response = call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+            if hasattr(response, 'status_code'):
+                assert response.status_code < 400, f'{name} -> {response.status_code}'
+        results[name] = {**{key: round(value, 3) for key, value in _percentiles(latencies).items()},
+                         'queries_per_request': round(statistics.mean(queries), 2), 'requests': n}
+    sio.disconnect()
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['results']
+    print(f"api: {n} requests per endpoint on {dataset}")
+    print(f"{'endpoint':28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, result in results.items():
+        line = f"{name:28} {result['p50']:8.2f} {result['p95']:8.2f} {result['p99']:8.2f} {result['queries_per_request']:8.2f}"
+        if baseline and name in baseline:
+            old = baseline[name]
+            line += (f"   p95 {(result['p95'] - old['p95']) / old['p95'] * 100:+.0f}%"
+                     f", queries {result['queries_per_request'] - old['queries_per_request']:+.2f}")
+        print(line)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'commit': _git_commit(), 'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+                       'dataset': dataset, 'requests': n, 'results': results}, f, indent=2)
+        print(f'api: results written to {output}')
+    return results
+
+def _legacy_extract_keywords(content):
+    words = content.split()
+    keywords = [word.strip('.,!?:;"()').lower() for word in words if len(word.strip('.,!?:;"()')) > 3]
+    return list(set(keywords))
+
+def bench_keywords(n):
+    """Keyword extraction on ~2.5k word reflections: original split/strip vs tokenizer."""
+    from tokenizer import extract_keywords, stem
+    rng = random.Random(0)
+    vocab = ('reflection learning groups working through challenges that with have really database '
+             'queries improving teammates, discussed. ideas! writing (notes) tested results; because').split()
+    docs = [' '.join(rng.choice(vocab) + rng.choice(['', 's', 'ing']) for _ in range(2500)) for _ in range(20)]
+    for name, fn in (('split/strip', _legacy_extract_keywords),
+                     ('tokenizer', extract_keywords),
+                     ('tokenizer top_k=20', lambda d: extract_keywords(d, 20))):
+        stem.cache_clear()
+        start = time.perf_counter()
+        for _ in range(n):
+            for doc in docs:
+                result = fn(doc)
+        elapsed = time.perf_counter() - start
+        print(f'keywords [{name}]: {n * len(docs) / elapsed:.0f} docs/sec, {len(result)} keywords per doc')
+
+def _fanout_worker(url, n, ready, results):
+    from pubsub import SQLiteManager
+    listener = SQLiteManager(url)._listen()
+    ready.release()
+    received, start = 0, None
+    for payload in listener:
+        start = start or time.perf_counter()
+        received += 1
+        if received == n:
+            break
+    results.put((received, time.perf_counter() - start))
+
+def bench_fanout(n, workers=4):
+    """Socket.IO events/sec through the SQLite message queue to N worker processes."""
+    import multiprocessing
+    from pubsub import SQLiteManager
+    url = 'sqlite:///' + os.path.join(_tmpdir, f'socketio-{time.time_ns()}.db')
+    publisher = SQLiteManager(url, write_only=True)
+    ready, results = multiprocessing.Semaphore(0), multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_fanout_worker, args=(url, n, ready, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    for i in range(n):
+        publisher.emit('garden_update', {'userId': i % 50}, room=f'user_{i % 50}')
+    publish_elapsed = time.perf_counter() - start
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    delivered = sum(received for received, _ in stats)
+    slowest = max(elapsed for _, elapsed in stats)
+    print(f'fanout: published {n} events at {n / publish_elapsed:.0f}/sec; '
+          f'{delivered} deliveries to {workers} workers at {delivered / slowest:.0f} events/sec')
+
+def bench_leaderboard(n, users=100_000):
+    """Top-k / rank / update latency of the in-memory leaderboard at 100k users."""
+    from app import Leaderboard
+    rng = random.Random(0)
+    start = time.perf_counter()
+    board = Leaderboard.from_scores({user_id: rng.randrange(50_000) for user_id in range(users)})
+    print(f'leaderboard: built {users} users in {time.perf_counter() - start:.2f}s')
+    ids = [rng.randrange(users) for _ in range(n)]
+    for name, op in (('top10', lambda uid: board.top(10)),
+                     ('rank', board.rank),
+                     ('update', lambda uid: board.update(uid, board.xp(uid) + 10))):
+        start = time.perf_counter()
+        for uid in ids:
+            op(uid)
+        print(f'leaderboard [{name}]: {(time.perf_counter() - start) / n * 1e6:.1f} us/op')
+
+BENCHMARKS = {'posts': bench_posts, 'dashboard': bench_dashboard, 'mixed': bench_mixed, 'keywords': bench_keywords, 'fanout': bench_fanout,
+              'leaderboard': bench_leaderboard, 'api': bench_api}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*', default=list(BENCHMARKS))
+    parser.add_argument('--n', type=int, default=200)
+    for key, default in DATASET.items():
+        parser.add_argument(f'--{key}', type=int, default=default)
+    parser.add_argument('--json', help='write api results to this file')
+    parser.add_argument('--compare', help='api results file to diff against')
+    args = parser.parse_args()
+    for name in args.names:
+        if name == 'api':
+            bench_api(args.n, {key: getattr(args, key) for key in DATASET}, args.json, args.compare)
+        else:
+            BENCHMARKS[name](args.n)
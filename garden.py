@@ -0,0 +1,26 @@
+"""Plant growth simulation.
+
+A UserPlant row holds a snapshot (current_stage, last_watered). Waterings
+after that snapshot are appended to plant_waterings and replayed on read; a
+compaction pass periodically folds them back into the snapshot. Replaying is
+pure and deterministic, so readers, the compactor and every worker agree on
+a plant's stage.
+"""
+from datetime import timedelta
+
+# A watering only grows the plant if the previous one was at least this long ago
+WATER_COOLDOWN = timedelta(seconds=10)
+
+def can_water(stage, last_watered, max_stage, now, cooldown=None):
+    if stage >= max_stage:
+        return False
+    cooldown = WATER_COOLDOWN if cooldown is None else cooldown
+    return last_watered is None or now - last_watered >= cooldown
+
+def replay(stage, last_watered, waterings, max_stage, cooldown=None):
+    """Apply ascending watering timestamps to a snapshot; returns (stage, last_watered)."""
+    for watered_at in waterings:
+        if can_water(stage, last_watered, max_stage, watered_at, cooldown):
+            stage += 1
+            last_watered = watered_at
+    return stage, last_watered
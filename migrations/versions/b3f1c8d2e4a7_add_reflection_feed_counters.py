@@ -0,0 +1,35 @@
+"""Add vote_total and comment_count counters to reflections
+
+Revision ID: b3f1c8d2e4a7
+Revises: 4c335c1ecd9d
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c8d2e4a7'
+down_revision = '4c335c1ecd9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reflections', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('vote_total', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing votes and comments
+    op.execute("""
+        UPDATE reflections SET
+            vote_total = COALESCE((SELECT SUM(value) FROM votes WHERE votes.reflection_id = reflections.id), 0),
+            comment_count = (SELECT COUNT(*) FROM comments WHERE comments.reflection_id = reflections.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('reflections', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('vote_total')
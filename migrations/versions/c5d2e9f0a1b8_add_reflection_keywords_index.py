@@ -0,0 +1,36 @@
+"""Add reflection_keywords search index table
+
+Revision ID: c5d2e9f0a1b8
+Revises: b3f1c8d2e4a7
+Create Date: 2026-10-18 11:03:17.540932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2e9f0a1b8'
+down_revision = 'b3f1c8d2e4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reflection_keywords',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reflection_id', sa.Integer(), nullable=False),
+    sa.Column('keyword', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['reflection_id'], ['reflections.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reflection_keywords', schema=None) as batch_op:
+        batch_op.create_index('ix_reflection_keywords_keyword_reflection_id', ['keyword', 'reflection_id'], unique=False)
+    # Existing reflections are indexed with `flask rebuild-search-index`
+
+
+def downgrade():
+    with op.batch_alter_table('reflection_keywords', schema=None) as batch_op:
+        batch_op.drop_index('ix_reflection_keywords_keyword_reflection_id')
+
+    op.drop_table('reflection_keywords')
@@ -0,0 +1,38 @@
+"""Add plant_waterings event log
+
+Revision ID: d8a4f7b3c6e1
+Revises: c5d2e9f0a1b8
+Create Date: 2026-10-18 14:27:52.902611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4f7b3c6e1'
+down_revision = 'c5d2e9f0a1b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('plant_waterings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('plant_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('watered_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['plant_id'], ['user_plants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('plant_waterings', schema=None) as batch_op:
+        batch_op.create_index('ix_plant_waterings_plant_id_id', ['plant_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('plant_waterings', schema=None) as batch_op:
+        batch_op.drop_index('ix_plant_waterings_plant_id_id')
+
+    op.drop_table('plant_waterings')
@@ -0,0 +1,32 @@
+"""Add garden_version to users and user_plants
+
+Revision ID: e2b7c4a9d5f3
+Revises: d8a4f7b3c6e1
+Create Date: 2026-10-18 16:05:38.117420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4a9d5f3'
+down_revision = 'd8a4f7b3c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('garden_version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('user_plants', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('garden_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user_plants', schema=None) as batch_op:
+        batch_op.drop_column('garden_version')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('garden_version')
@@ -0,0 +1,49 @@
+"""Add composite indexes for hot query paths and unique user_badges
+
+Revision ID: f4c1a8e6b2d9
+Revises: e2b7c4a9d5f3
+Create Date: 2026-10-18 17:40:09.664835
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a8e6b2d9'
+down_revision = 'e2b7c4a9d5f3'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('reflections', 'ix_reflections_user_id_created_at', ['user_id', 'created_at']),
+    ('reflections', 'ix_reflections_group_id_created_at', ['group_id', 'created_at']),
+    ('goals', 'ix_goals_created_by_type', ['created_by', 'type']),
+    ('goals', 'ix_goals_created_by_created_at', ['created_by', 'created_at']),
+    ('goals', 'ix_goals_group_id_created_at', ['group_id', 'created_at']),
+    ('user_plants', 'ix_user_plants_user_id', ['user_id']),
+    ('user_plants', 'ix_user_plants_group_id', ['group_id']),
+    ('group_members', 'ix_group_members_user_id_group_id', ['user_id', 'group_id']),
+    ('group_members', 'ix_group_members_group_id_user_id', ['group_id', 'user_id']),
+    ('reflection_tags', 'ix_reflection_tags_reflection_id', ['reflection_id']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    # Keep the earliest award of any duplicated badge before enforcing uniqueness
+    op.execute("""
+        DELETE FROM user_badges WHERE id NOT IN (
+            SELECT MIN(id) FROM user_badges GROUP BY user_id, badge_id
+        )
+    """)
+    op.create_index('uq_user_badges_user_id_badge_id', 'user_badges', ['user_id', 'badge_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_user_badges_user_id_badge_id', table_name='user_badges')
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,68 @@
+"""SQLite-backed Socket.IO client manager.
+
+Lets several worker processes on one host share Socket.IO rooms without an
+external broker: every emit is appended to a small SQLite table and each
+worker tails it. Use ``SOCKETIO_MESSAGE_QUEUE=sqlite:///path/to/socketio.db``
+for local multi-worker runs and tests; point it at redis:// or amqp:// in
+production to use the stock python-socketio managers instead.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+import socketio
+
+
+class SQLiteManager(socketio.PubSubManager):
+    name = 'sqlite'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None,
+                 poll_interval=0.02, retention=60):
+        if not url.startswith('sqlite:///'):
+            raise ValueError(f'Not a sqlite URL: {url}')
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = url[len('sqlite:///'):]
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._published = 0
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS socketio_messages ('
+                         'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, '
+                         'payload TEXT NOT NULL, created_at REAL NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+                     (self.channel, json.dumps(data), now))
+        self._published += 1
+        if self._published % 500 == 0:
+            conn.execute('DELETE FROM socketio_messages WHERE created_at < ?', (now - self.retention,))
+
+    def _sleep(self):
+        if self.server is not None:
+            self.server.sleep(self.poll_interval)
+        else:
+            time.sleep(self.poll_interval)
+
+    def _listen(self):
+        conn = self._connect()
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        while True:
+            rows = conn.execute('SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                                (last_id, self.channel)).fetchall()
+            for last_id, payload in rows:
+                yield payload
+            if not rows:
+                self._sleep()
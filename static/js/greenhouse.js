@@ -21,6 +21,8 @@ document.addEventListener('DOMContentLoaded', () => {
             this.cancel = document.getElementById('cancel-group-button');
             this.classDD = document.getElementById('class-name');
             this.members = document.getElementById('member-list');
+            this.memberSearch = document.getElementById('member-search');
+            this.selectedMembers = new Set();
         }
 
         setupEventListeners() {
@@ -35,9 +37,18 @@ document.addEventListener('DOMContentLoaded', () => {
                 e.preventDefault();
                 this.createGroup();
             });
-            this.classDD?.addEventListener('change', e => this.loadMembers(e.target.value));
+            this.classDD?.addEventListener('change', () => this.loadMembers());
+            this.memberSearch?.addEventListener('input', () => {
+                clearTimeout(this.searchTimer);
+                this.searchTimer = setTimeout(() => this.loadMembers(), 150);
+            });
+            this.members.addEventListener('change', e => {
+                if (e.target.type !== 'checkbox') return;
+                e.target.checked ? this.selectedMembers.add(e.target.value) : this.selectedMembers.delete(e.target.value);
+            });
 
-            this.socket.on('group_created', () => this.loadGroups());
+            // Only sent to the new group's members, with just the fields the list needs
+            this.socket.on('group_created', g => this.addGroup(g));
             this.socket.on('new_group_reflection', () => {
                 if (this.currentGroupId) this.loadActivity(this.currentGroupId);
             });
@@ -64,6 +75,15 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         }
 
+        addGroup(g) {
+            if (!this.groups) return this.loadGroups();
+            if (this.groups.some(x => String(x.id) === String(g.id))) return;
+            this.groups.push(g);
+            this.renderList();
+            this.groupCount.textContent = `${this.groups.length} Group${this.groups.length !== 1 ? 's' : ''}`;
+            if (!this.currentGroupId) this.selectGroup(g.id);
+        }
+
         renderList() {
             this.groupList.innerHTML = '';
             this.groups.forEach(g => {
@@ -119,11 +139,15 @@ document.addEventListener('DOMContentLoaded', () => {
             setTimeout(() => f.classList.remove('grow-animation'), 600);
         }
 
-        async loadActivity(id) {
-            const r = await fetch(`/api/groups/${id}/activity`);
+        // Newest page first; "Load older" follows X-Next-Cursor and prepends the next page
+        async loadActivity(id, cursor = null) {
+            const params = cursor ? `?${new URLSearchParams({ cursor })}` : '';
+            const r = await fetch(`/api/groups/${id}/activity${params}`);
             const acts = await r.json();
-            this.feed.innerHTML = '';
-            if (!acts.length) {
+            if (String(id) !== String(this.currentGroupId)) return;
+            if (!cursor) this.feed.innerHTML = '';
+            this.feed.querySelector('.more-activity')?.remove();
+            if (!acts.length && !cursor) {
                 this.feed.innerHTML = '<p>No recent activity</p>';
                 return;
             }
@@ -141,25 +165,49 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
                 this.feed.prepend(d);
             });
+            const next = r.headers.get('X-Next-Cursor');
+            if (next) {
+                const more = document.createElement('button');
+                more.type = 'button';
+                more.className = 'more-activity';
+                more.textContent = 'Load older';
+                more.addEventListener('click', () => this.loadActivity(id, next));
+                this.feed.prepend(more);
+            }
         }
 
-        async loadMembers(cls) {
-            let users = await (await fetch('/api/users')).json();
-            users = users.filter(u => u.id !== currentUserId);
-            this.members.innerHTML = '';
+        // One page of matching usernames per call; "More" follows X-Next-Cursor
+        async loadMembers(cursor = null) {
+            const q = this.memberSearch ? this.memberSearch.value.trim() : '';
+            const params = new URLSearchParams({ q });
+            if (cursor) params.set('cursor', cursor);
+            const r = await fetch(`/api/users?${params}`);
+            if (q !== (this.memberSearch ? this.memberSearch.value.trim() : '')) return;
+            const users = (await r.json()).filter(u => u.id !== currentUserId);
+            if (!cursor) this.members.innerHTML = '';
+            this.members.querySelector('.more-members')?.remove();
             users.forEach(u => {
                 const dd = document.createElement('div');
                 dd.innerHTML = `
-          <input type="checkbox" id="m${u.id}" value="${u.id}">
+          <input type="checkbox" id="m${u.id}" value="${u.id}"${this.selectedMembers.has(String(u.id)) ? ' checked' : ''}>
           <label for="m${u.id}">${u.username}</label>`;
                 this.members.appendChild(dd);
             });
+            const next = r.headers.get('X-Next-Cursor');
+            if (next) {
+                const more = document.createElement('button');
+                more.type = 'button';
+                more.className = 'more-members';
+                more.textContent = 'More';
+                more.addEventListener('click', () => this.loadMembers(next));
+                this.members.appendChild(more);
+            }
         }
 
         async createGroup() {
             const nm = document.getElementById('group-name').value;
             const cls = this.classDD.value;
-            const mems = [...this.members.querySelectorAll('input:checked')].map(i => i.value);
+            const mems = [...this.selectedMembers].map(Number);
             if (!nm || !cls) return alert('Name+Class required');
             const r = await fetch('/api/groups', {
                 method: 'POST',
@@ -170,7 +218,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 const err = await r.json();
                 return alert(err.error || 'fail');
             }
-            this.loadGroups();
+            this.addGroup(await r.json());
             this.closeModal();
         }
 
@@ -179,6 +227,7 @@ document.addEventListener('DOMContentLoaded', () => {
             this.modal.style.display = 'none';
             this.form.reset();
             this.members.innerHTML = '';
+            this.selectedMembers.clear();
         }
     }
 
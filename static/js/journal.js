@@ -139,9 +139,18 @@
             </div>
         `;
         container.prepend(card);
+        socket.emit('join_reflection', { reflection_id: r.id });
         setTimeout(() => card.classList.remove('animate-feed'), 400);
     }
 
+    socket.on('new_comment', data => {
+        const card = document.querySelector(`[data-id="ref-${data.reflectionId}"]`);
+        if (!card) return;
+        const div = document.createElement('div');
+        div.textContent = `${data.comment.author}: ${data.comment.content}`;
+        card.querySelector('.comments-list').appendChild(div);
+    });
+
     socket.on('new_reflection', data => {
         const isGroup = Boolean(data.reflection.group_id);
         if ((!isGroup && currentTab === 'self') ||
@@ -156,20 +165,11 @@
         const input = ev.target.previousElementSibling;
         const content = input.value.trim();
         if (!content) return alert('Write a comment!');
-        fetch(`/api/reflections/${id}/comments`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ content })
-        })
-            .then(r => r.json())
-            .then(data => {
-                const list = ev.target.nextElementSibling;
-                const div = document.createElement('div');
-                div.textContent = `${data.comment.author}: ${data.comment.content}`;
-                list.appendChild(div);
-                input.value = '';
-            })
-            .catch(console.error);
+        // Acknowledged once queued; the comment itself arrives via 'new_comment'
+        socket.emit('new_comment', { reflection_id: Number(id), content }, ack => {
+            if (ack && ack.error) return alert(ack.error);
+            input.value = '';
+        });
     });
 
     fetch('/api/recent-activity')
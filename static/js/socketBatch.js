@@ -0,0 +1,16 @@
+// Unpacks the server's coalesced 'batch' frames into the individual events
+// the page scripts already listen for. Load right after socket.io.min.js.
+(function () {
+    const connect = window.io;
+    if (!connect) return;
+    window.io = function (...args) {
+        const socket = connect(...args);
+        socket.on('batch', frames => {
+            frames.forEach(({ event, data }) => {
+                socket.listeners(event).forEach(handler => handler(data));
+            });
+        });
+        return socket;
+    };
+    Object.assign(window.io, connect);
+})();
@@ -0,0 +1,26 @@
+import os, sys, tempfile
+
+import pytest
+
+# Point the app at a throwaway database before it is imported
+_tmpdir = tempfile.mkdtemp(prefix='garden-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmpdir, 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench
+from app import app
+
+app.config['TESTING'] = True
+
+@pytest.fixture
+def seed():
+    """bench.seed: a fresh schema with users user0..userN-1, all with password 'password'."""
+    return bench.seed
+
+@pytest.fixture
+def login():
+    return bench.login
+
+@pytest.fixture(scope='module')
+def dataset():
+    bench.seed_dataset(users=30, groups=4, members=6, reflections=200, goals=60, plants=50)
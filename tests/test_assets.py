@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import app as garden_app
+from app import app
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    static = tmp_path / 'static'
+    (static / 'js').mkdir(parents=True)
+    monkeypatch.setattr(app, 'static_folder', str(static))
+    monkeypatch.setattr(garden_app, 'ASSET_DIR', str(static / 'dist'))
+    monkeypatch.setattr(garden_app, 'ASSET_MANIFEST_DIR', str(static / 'dist' / 'manifests'))
+    yield static
+    monkeypatch.undo()
+    garden_app.load_asset_manifest()
+
+def build(static, source):
+    (static / 'js' / 'app.js').write_text(source)
+    result = app.test_cli_runner().invoke(args=['build-assets'])
+    assert result.exit_code == 0, result.output
+    return garden_app.asset_url('js/app.js')
+
+def test_rebuild_keeps_earlier_builds_until_pruned(static_dir):
+    client = app.test_client()
+    old_url = build(static_dir, 'console.log("one");' * 20)
+    new_url = build(static_dir, 'console.log("two");' * 20)
+    assert old_url != new_url
+    assert client.get(old_url).status_code == 200
+    assert client.get(new_url).status_code == 200
+
+    result = app.test_cli_runner().invoke(args=['prune-assets', '--keep', '1'])
+    assert result.exit_code == 0, result.output
+    garden_app.load_asset_manifest()
+    assert client.get(old_url).status_code == 404
+    assert client.get(new_url).status_code == 200
+
+def test_worker_picks_up_a_newer_build(static_dir, monkeypatch):
+    build(static_dir, 'console.log("one");' * 20)
+    stale = (garden_app._asset_manifest, garden_app._assets_by_path, garden_app._asset_manifest_mtime)
+    new_url = build(static_dir, 'console.log("two");' * 20)
+    # A worker still holding the first build gets a page rendered by one on the second
+    monkeypatch.setattr(garden_app, '_asset_manifest', stale[0])
+    monkeypatch.setattr(garden_app, '_assets_by_path', stale[1])
+    monkeypatch.setattr(garden_app, '_asset_manifest_mtime', stale[2])
+    assert app.test_client().get(new_url).status_code == 200
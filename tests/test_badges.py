@@ -0,0 +1,26 @@
+import pytest
+
+from app import app, db, Badge, User, UserBadge, compile_criteria, create_groups
+
+@pytest.mark.parametrize('criteria', [{'streak': '7'}, {'xp': None}, {'groups': {'gte': True}}])
+def test_non_numeric_threshold_is_rejected(criteria):
+    with pytest.raises(ValueError):
+        compile_criteria(criteria)
+
+def test_bad_badge_is_skipped(seed, login):
+    seed(1)
+    with app.app_context():
+        db.session.add(Badge(name='Broken', icon='x.png', criteria={'streak': '7'}))
+        db.session.commit()
+    client = login(app.test_client())
+    assert client.post('/api/reflections', json={'content': 'Still works'}).status_code == 200
+
+def test_group_badges_reach_every_new_member(seed):
+    seed(4)
+    with app.app_context():
+        db.session.add(Badge(name='Joiner', icon='join.png', criteria={'groups': 1}))
+        db.session.commit()
+        badge_id = Badge.query.filter_by(name='Joiner').one().id
+        create_groups(db.session.get(User, 1), [{'name': 'Study', 'members': [2, 3]}])
+        holders = {user_id for (user_id,) in db.session.query(UserBadge.user_id).filter_by(badge_id=badge_id)}
+    assert holders == {1, 2, 3}
@@ -0,0 +1,24 @@
+import sqlite3
+from datetime import datetime
+
+from app import app, db, catalog
+
+def test_plant_type_added_by_another_process(seed, login):
+    seed(1)
+    client = login(app.test_client())
+    with app.app_context():
+        catalog.ensure_loaded()
+        path = db.engine.url.database
+
+    # A seed script or another worker writes straight to the database
+    connection = sqlite3.connect(path)
+    with connection:
+        plant_type_id = connection.execute(
+            "INSERT INTO plant_types (name, stages) VALUES ('Moonflower', '{\"0\": \"sprout.jpg\"}')").lastrowid
+        connection.execute("INSERT INTO user_plants (user_id, plant_type_id, current_stage, planted_at, last_watered) "
+                           "VALUES (1, ?, 0, ?, ?)", (plant_type_id, datetime.utcnow(), datetime.utcnow()))
+    connection.close()
+
+    response = client.get('/api/garden-state')
+    assert response.status_code == 200
+    assert 'Moonflower' in response.get_data(as_text=True)
@@ -0,0 +1,32 @@
+import time
+
+from app import app, socketio
+
+def wait_for(client, event, timeout=2.0):
+    """Packets named event that reach client within timeout (room emits are flushed in the background)."""
+    deadline = time.monotonic() + timeout
+    received = []
+    while time.monotonic() < deadline:
+        received += [packet for packet in client.get_received() if packet['name'] == event]
+        if received:
+            break
+        time.sleep(0.02)
+    return received
+
+def test_group_created_reaches_members_only(seed, login):
+    seed(3)
+    member, outsider = (socketio.test_client(app, flask_test_client=login(app.test_client(), f'user{i}'))
+                        for i in (1, 2))
+    try:
+        creator = login(app.test_client())
+        response = creator.post('/api/groups', json={'name': 'Study Circle', 'class_name': 'Math 101', 'members': [2]})
+        assert response.status_code == 201
+        group_id = response.get_json()['id']
+
+        packets = wait_for(member, 'group_created')
+        assert [packet['args'][0] for packet in packets] == [
+            {'id': group_id, 'name': 'Study Circle', 'class_name': 'Math 101', 'memberCount': 2}]
+        assert wait_for(outsider, 'group_created', timeout=0.3) == []
+    finally:
+        member.disconnect()
+        outsider.disconnect()
@@ -0,0 +1,28 @@
+from app import app, db, User, create_groups
+
+def test_duplicate_names_compare_case_insensitively(seed):
+    seed(2)
+    with app.app_context():
+        creator = db.session.get(User, 1)
+        created, skipped, _ = create_groups(creator, [{'name': 'Chess Club', 'class_name': 'A'}])
+        assert len(created) == 1 and skipped == []
+
+        created, skipped, _ = create_groups(creator, [
+            {'name': 'chess club', 'class_name': 'A'},
+            {'name': 'Go Club', 'class_name': 'A'},
+            {'name': 'GO CLUB', 'class_name': 'A'},
+            {'name': 'chess club', 'class_name': 'B'},
+        ])
+        assert [(g['name'], g['class_name']) for g in created] == [('Go Club', 'A'), ('chess club', 'B')]
+        assert [(s['name'], s['reason']) for s in skipped] == [
+            ('chess club', 'Group already exists'), ('GO CLUB', 'Duplicate group in import')]
+
+def test_member_refs_prefer_usernames_over_ids(seed):
+    seed(3)
+    with app.app_context():
+        db.session.add(User(username='2024', email='2024@example.com'))  # id 4
+        db.session.commit()
+        creator = db.session.get(User, 1)
+        created, _, unknown = create_groups(creator, [{'name': 'Refs', 'members': ['2024', '3', 2, True, 'nobody']}])
+    assert created[0]['memberCount'] == 4  # creator, '2024' -> id 4, '3' -> id 3 (no such username), 2
+    assert [entry['member'] for entry in unknown] == ['nobody', True]
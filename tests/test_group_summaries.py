@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+import app as garden_app
+from app import app, db, GroupMember
+
+def add_member_elsewhere(user_id, group_id):
+    """Insert a membership the way another worker would: no session, no invalidation hooks here."""
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(insert(GroupMember), {'user_id': user_id, 'group_id': group_id, 'joined_at': datetime.utcnow()})
+
+def member_count(client, group_id):
+    return next(g['memberCount'] for g in client.get('/api/groups').get_json() if g['id'] == group_id)
+
+def test_group_summary_expires(seed, login, monkeypatch):
+    seed(3)
+    client = login(app.test_client())
+    group_id = client.post('/api/groups', json={'name': 'Readers', 'class_name': 'Lit 1', 'members': [2]}).get_json()['id']
+    assert member_count(client, group_id) == 2
+
+    add_member_elsewhere(3, group_id)
+    assert member_count(client, group_id) == 2  # served from this worker's cache until it expires
+
+    monkeypatch.setitem(garden_app._group_summaries, group_id, (0, garden_app._group_summaries[group_id][1]))
+    assert member_count(client, group_id) == 3
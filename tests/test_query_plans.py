@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+
+from app import app, db, query_plan_problems
+
+HOT_ENDPOINTS = [
+    ('GET', '/api/recent-activity', None),
+    ('GET', '/api/garden-state', None),
+    ('GET', '/api/goals', None),
+    ('GET', '/api/groups', None),
+    ('GET', '/api/groups/1', None),
+    ('GET', '/api/groups/1/activity', None),
+    ('GET', '/api/reflections/search?q=learning', None),
+    ('GET', '/api/milestones', None),
+    ('GET', '/dashboard', None),
+    ('POST', '/api/reflections', {'content': 'Indexes keep the garden growing', 'tags': ['db']}),
+]
+
+def full_scans(statements):
+    """(sql, plan detail) for every captured statement whose plan scans a whole table."""
+    tables = set(db.metadata.tables)
+    scans = []
+    with db.engine.connect() as connection:
+        for sql, parameters in statements:
+            for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parameters):
+                words = row[-1].split()
+                if words[0] == 'SCAN' and words[1] in tables:
+                    scans.append((sql, row[-1]))
+    return scans
+
+@pytest.fixture
+def client(dataset, login):
+    return login(app.test_client())
+
+@pytest.mark.parametrize('method,path,body', HOT_ENDPOINTS, ids=[f'{m} {p}' for m, p, _ in HOT_ENDPOINTS])
+def test_endpoint_queries_use_indexes(client, method, path, body):
+    client.open(path, method=method, json=body)  # warm per-process caches
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.open(path, method=method, json=body)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code < 400
+    assert statements, f'{method} {path} issued no SELECTs'
+    with app.app_context():
+        assert full_scans(statements) == []
+
+def test_hot_query_shapes_use_indexes(dataset):
+    with app.app_context():
+        assert query_plan_problems() == []
@@ -0,0 +1,18 @@
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+
+from app import app, db, profiler
+
+def test_failed_statements_leave_nothing_on_the_connection(seed):
+    seed(1)
+    with app.test_request_context():
+        profiler.start()
+        with db.engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.exec_driver_sql('SELECT * FROM no_such_table')
+            connection.exec_driver_sql('SELECT 1')
+            assert not any(isinstance(value, list) for value in connection.info.values())
+        assert g.query_profile['statements']['SELECT 1'] == 1
+        assert g.query_profile['db_seconds'] > 0
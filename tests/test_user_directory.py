@@ -0,0 +1,27 @@
+import sqlite3
+import time
+
+from app import app, db, user_directory
+
+def usernames(client, prefix):
+    return [user['username'] for user in client.get(f'/api/users?q={prefix}').get_json()]
+
+def test_directory_refreshes_in_the_background(seed, login, monkeypatch):
+    seed(2)
+    client = login(app.test_client())
+    assert usernames(client, 'user') == ['user1']
+
+    with app.app_context():
+        connection = sqlite3.connect(db.engine.url.database)
+    with connection:
+        connection.execute("INSERT INTO users (username, email, password_hash) VALUES ('user9', 'user9@example.com', 'x')")
+    connection.close()
+
+    monkeypatch.setattr(user_directory, '_loaded_at', time.monotonic() - user_directory.refresh_interval)
+    with user_directory._build_lock:
+        # The request answers from the old snapshot instead of waiting for the reload
+        assert usernames(client, 'user') == ['user1']
+    deadline = time.monotonic() + 2
+    while usernames(client, 'user') != ['user1', 'user9'] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert usernames(client, 'user') == ['user1', 'user9']